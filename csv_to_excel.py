@@ -1,48 +1,138 @@
+import json
+import os
+
 import pandas as pd
-from openpyxl import load_workbook, Workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from scrapy.utils.project import get_project_settings
+
+from tutorial.commands.crawlall import vendor_spiders
 
 # File paths (change accordingly)
-csv_filename = 'genscript.csv'
-sheet_name = csv_filename.replace('.csv', '')
+# One sheet per vendor spider, named after it; other CSVs (change feeds,
+# tombstones, test crawls) are left out
+source_patterns = ['{name}.csv', 'output/{name}.parquet']
 excel_path = 'scrape-data-protein.xlsx'
+# Remembers which source each sheet was built from, so unchanged ones aren't re-read
+manifest_path = excel_path + '.sources.json'
+max_width = 255  # Excel's limit
+
+
+def find_sources(names, patterns):
+    """Map sheet name -> source file of every vendor in ``names``; the newer
+    file wins if a vendor has both.
+
+    Missing and empty files (a crawl that exported nothing) are skipped.
+    """
+    sources = {}
+    for name in names:
+        for pattern in patterns:
+            path = pattern.format(name=name)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                continue
+            sheet_name = name[:31]
+            if sheet_name not in sources or os.path.getmtime(path) > os.path.getmtime(sources[sheet_name]):
+                sources[sheet_name] = path
+    return sources
+
+
+def fingerprint(path):
+    stat = os.stat(path)
+    return {'source': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def is_current(entry, path):
+    """Whether a manifest entry was built from ``path`` as it is now."""
+    if not entry:
+        return False
+    return {key: entry.get(key) for key in ('source', 'size', 'mtime_ns')} == fingerprint(path)
+
+
+def load_source(path):
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    # List columns (parsed sizes/prices) are shown "/"-joined, like the scraped text
+    for column in df.columns[df.dtypes == object]:
+        is_list = df[column].map(lambda value: hasattr(value, '__len__') and not isinstance(value, str))
+        if is_list.any():
+            df.loc[is_list, column] = df.loc[is_list, column].map(lambda value: '/'.join(map(str, value)))
+    return df
+
+
+def column_widths(df):
+    """Widest value (or header) of every column, plus padding."""
+    lengths = df.astype(str).where(df.notna(), '').apply(lambda column: column.str.len().max())
+    headers = pd.Series([len(str(title)) for title in df.columns], index=df.columns)
+    widths = pd.concat([lengths.fillna(0), headers], axis=1).max(axis=1) + 2
+    return [int(width) for width in widths.clip(upper=max_width)]
+
+
+def add_sheet(wb, sheet_name, widths, header, rows):
+    ws = wb.create_sheet(title=sheet_name)
+    # Write-only sheets need their widths before the first row
+    for col_num, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+    if header is not None:
+        ws.append(header)
+    for row in rows:
+        ws.append(row)
+
+
+def main():
+    vendors = vendor_spiders(get_project_settings())
+    sources = find_sources(vendors, source_patterns)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    try:
+        old_wb = load_workbook(excel_path, read_only=True)
+    except FileNotFoundError:
+        old_wb = None
+    old_sheets = old_wb.sheetnames if old_wb else []
+    # Sheets built from files that aren't vendor feeds (by an older version of this script)
+    stale = {name for name in old_sheets if name in manifest and name not in vendors}
+    old_sheets = [name for name in old_sheets if name not in stale]
+
+    changed = {
+        name for name, path in sources.items()
+        if name not in old_sheets or not is_current(manifest.get(name), path)
+    }
+    if old_wb is not None and not changed and not stale:
+        print('Nothing changed, workbook is up to date:', excel_path)
+        return
+
+    # Write-only workbooks stream rows to disk, so build a new file next to the old one
+    wb = Workbook(write_only=True)
+    for sheet_name in old_sheets + sorted(set(sources) - set(old_sheets)):
+        if sheet_name in changed:
+            df = load_source(sources[sheet_name])
+            widths = column_widths(df)
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            add_sheet(wb, sheet_name, widths, list(df.columns), rows)
+            manifest[sheet_name] = {**fingerprint(sources[sheet_name]), 'widths': widths}
+            print('Output sheet created/updated:', sheet_name)
+        else:
+            # Unchanged (or not built from a source here): copy the rows as they are
+            widths = manifest.get(sheet_name, {}).get('widths', [])
+            add_sheet(wb, sheet_name, widths, None, old_wb[sheet_name].iter_rows(values_only=True))
+
+    temp_path = excel_path + '.tmp'
+    wb.save(temp_path)
+    if old_wb is not None:
+        old_wb.close()
+    os.replace(temp_path, excel_path)
+    for sheet_name in stale:
+        del manifest[sheet_name]
+        print('Output sheet removed:', sheet_name)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print('Output file saved:', excel_path)
+
 
-# Load CSV data
-df = pd.read_csv(csv_filename)
-
-try:
-    # Try to load the existing workbook
-    wb = load_workbook(excel_path)
-except FileNotFoundError:
-    # Create new workbook if file doesn't exist
-    wb = Workbook()
-    wb.remove(wb.active)  # Remove default sheet
-
-# Remove sheet if it already exists
-if sheet_name in wb.sheetnames:
-    std = wb[sheet_name]
-    wb.remove(std)
-
-# Create a new sheet with the desired name
-ws = wb.create_sheet(title=sheet_name)
-
-# Write headers
-for col_num, column_title in enumerate(df.columns, start=1):
-    ws.cell(row=1, column=col_num, value=column_title)
-
-# Write data rows
-for row_num, row_data in enumerate(df.values, start=2):
-    for col_num, cell_value in enumerate(row_data, start=1):
-        ws.cell(row=row_num, column=col_num, value=cell_value)
-
-# Adjust column widths
-for col in ws.columns:
-    max_length = 0
-    column_letter = col[0].column_letter
-    for cell in col:
-        if cell.value:
-            max_length = max(max_length, len(str(cell.value)))
-    ws.column_dimensions[column_letter].width = max_length + 2
-
-# Save workbook
-wb.save(excel_path)
-print("Output file created/updated in sheet:", sheet_name)
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,58 @@
+import os
+
 import pandas as pd
-import re
 
-def normalize(text):
-    """Lowercase, remove spaces and hyphens."""
-    if pd.isna(text):
-        return ''
-    return re.sub(r'[\s\-]', '', str(text).lower())
+from tutorial.aliases import AliasIndex
+from tutorial.matching import SymbolMatcher, normalize_names
+
+# 'tokens': whole-token matches through aliases ("IL1" doesn't match "IL10")
+# 'substring': any normalised symbol found anywhere in the name
+match_mode = 'tokens'
+
 
 def load_protein_symbols(filepath):
+    """Return ``{normalised symbol: symbol as listed}`` from the first column."""
     df = pd.read_excel(filepath)
     symbols = df.iloc[:, 0].dropna().astype(str)
-    return [normalize(symbol) for symbol in symbols]
+    return dict(zip(normalize_names(symbols), symbols))
+
+def load_alias_index(symbols, alias_table_file):
+    """Alias index of the optional symbol -> aliases table, plus the listed symbols.
+
+    Returns the index and the canonical symbols the protein list asks for.
+    """
+    if os.path.exists(alias_table_file):
+        index = AliasIndex.load(alias_table_file)
+    else:
+        index = AliasIndex()
+    listed = list(symbols.values())
+    index.add_symbols(listed)
+    wanted = {symbol for name in listed for symbol in index.lookup(name)}
+    return index, wanted
+
+def substring_matches(symbols):
+    # Compiled once, then each name is scanned in a single pass
+    matcher = SymbolMatcher(symbols)
+    return lambda names: matcher.find_all(names).map(lambda found: [symbols[symbol] for symbol in found])
 
-def match_symbol_in_name(name, symbols):
-    """Check if any symbol is substring of the normalized name."""
-    name_norm = normalize(name)
-    return any(symbol in name_norm for symbol in symbols)
+def alias_matches(index, wanted):
+    return lambda names: index.resolve_all(names).map(lambda found: [symbol for symbol in found if symbol in wanted])
 
-def filter_scrape_data(scrape_filepath, symbols):
+def filter_scrape_data(scrape_filepath, find_matches):
     # Load all sheets
     sheets = pd.read_excel(scrape_filepath, sheet_name=None)
     filtered_sheets = {}
 
     for sheet_name, df in sheets.items():
-        if df.shape[1] < 2:
-            # Skip sheets with less than 2 columns
-            filtered_sheets[sheet_name] = df
+        # Exports differ in column order (vendor and catalog_no may come first)
+        if 'name' not in df.columns:
+            print(f"Warning: skipping sheet {sheet_name!r} in {scrape_filepath}, it has no 'name' column")
             continue
 
-        # Column B (index 1) is the name column
-        mask = df.iloc[:, 1].apply(lambda name: match_symbol_in_name(name, symbols))
-        filtered_df = df[mask].copy()
+        matches = find_matches(df['name'])
+        matched = matches.str.len() > 0
+        filtered_df = df[matched].copy()
+        filtered_df['Matched symbols'] = matches[matched].str.join(', ')
 
         filtered_sheets[sheet_name] = filtered_df
 
@@ -39,12 +61,17 @@ def filter_scrape_data(scrape_filepath, symbols):
 def main():
     # File paths
     protein_list_file = 'protein-list.xlsx'
+    alias_table_file = 'gene-aliases.tsv'  # optional, HGNC-style symbol -> aliases
     scrape_data_file = 'scrape-data-protein.xlsx'
     output_file = 'filtered-scrape-protein-data.xlsx'
 
     # Process
     symbols = load_protein_symbols(protein_list_file)
-    filtered_sheets = filter_scrape_data(scrape_data_file, symbols)
+    if match_mode == 'substring':
+        find_matches = substring_matches(symbols)
+    else:
+        find_matches = alias_matches(*load_alias_index(symbols, alias_table_file))
+    filtered_sheets = filter_scrape_data(scrape_data_file, find_matches)
 
     # Save results
     with pd.ExcelWriter(output_file) as writer:
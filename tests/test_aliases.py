@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from tutorial.aliases import AliasIndex, tokenize
+
+
+@pytest.fixture
+def index():
+    index = AliasIndex()
+    index.add("IL1A", ["IL-1", "IL1"])
+    index.add("IL10", ["IL-10", "CSIF"])
+    index.add("IL1RN", ["IL-1 receptor antagonist", "IL1RA"])
+    index.add("TNF", ["TNF-alpha", "TNFA"])
+    return index
+
+
+def test_spellings_tokenize_alike():
+    assert tokenize("IL-10") == tokenize("IL10") == tokenize("il 10") == ("il", "10")
+
+
+def test_aliases_match_whole_tokens_only(index):
+    assert index.resolve("Human IL-10 protein") == ["IL10"]
+    assert index.resolve("IL-100") == []
+    assert index.resolve("IL-1 beta") == ["IL1A"]
+
+
+def test_longest_alias_wins(index):
+    assert index.resolve("IL-1 receptor antagonist, human") == ["IL1RN"]
+
+
+def test_every_symbol_named_in_order(index):
+    assert index.resolve("TNF-alpha and CSIF / IL-1") == ["TNF", "IL10", "IL1A"]
+
+
+def test_resolve_all_matches_resolve(index):
+    names = ["Mouse IL1RA", None, "Recombinant TNF alpha"]
+    assert index.resolve_all(names).tolist() == [["IL1RN"], [], ["TNF"]]
+
+
+def test_add_symbols_keeps_known_names(index):
+    index.add_symbols(["IL-10", "CCL2"])
+    assert index.lookup("IL10") == ["IL10"]
+    assert index.lookup("ccl-2") == ["CCL2"]
+
+
+def test_table_and_cached_index(tmp_path):
+    path = str(tmp_path / "aliases.tsv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("symbol\tname\talias_symbol\tprev_symbol\n")
+        f.write("IL1RN\tinterleukin 1 receptor antagonist\tIL1RA, ICIL-1RA\tIL1F3\n")
+    index = AliasIndex.load(path)
+    assert os.path.exists(path + ".index.pickle")
+    assert index.resolve("ICIL-1RA protein") == ["IL1RN"]
+    # The name column is not an alias column
+    assert index.resolve("interleukin 1 receptor antagonist") == []
+    assert AliasIndex.load(path).index == index.index
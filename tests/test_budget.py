@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.exceptions import DontCloseSpider
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from tutorial.budget import ProductBudget, request_kind
+from tutorial.middlewares import ProductBudgetMiddleware, ProductFirstMiddleware
+
+
+class CatalogSpider(Spider):
+    name = "catalog"
+
+    def parse_listing(self, response):
+        pass
+
+    def parse_product(self, response):
+        pass
+
+
+@pytest.fixture
+def spider():
+    return CatalogSpider()
+
+
+@pytest.fixture
+def crawled():
+    return []
+
+
+@pytest.fixture
+def budget(crawled):
+    crawler = SimpleNamespace(
+        stats=MemoryStatsCollector(get_crawler(CatalogSpider)),
+        engine=SimpleNamespace(crawl=crawled.append),
+    )
+    return ProductBudget(crawler, high_water=2, low_water=1)
+
+
+def product(spider, n=1):
+    return Request(f"https://example.com/p/{n}", callback=spider.parse_product)
+
+
+def listing(spider, n=1):
+    return Request(f"https://example.com/list?page={n}", callback=spider.parse_listing)
+
+
+def test_request_kind(spider):
+    assert request_kind(product(spider)) == "product"
+    assert request_kind(listing(spider)) == "listing"
+    assert request_kind(Request("https://example.com/")) == "listing"
+    override = Request("https://example.com/p/1", callback=spider.parse_listing, meta={"request_kind": "product"})
+    assert request_kind(override) == "product"
+
+
+def test_products_go_first_and_are_never_held(spider, budget):
+    middleware = ProductFirstMiddleware(budget, priority=10)
+    for n in range(3):
+        budget.request_scheduled(product(spider, n), spider)
+    entries = [listing(spider), product(spider, 9), {"name": "item"}]
+    out = list(middleware.process_spider_output(None, entries, spider))
+    # Over high water: the listing is held, the product and the item pass
+    assert out == entries[1:]
+    assert out[0].priority == 10
+    assert list(budget.held) == entries[:1]
+    assert budget.stats.get_value("budget/listings_held") == 1
+
+
+def test_listings_pass_below_high_water(spider, budget):
+    middleware = ProductFirstMiddleware(budget, priority=10)
+    budget.request_scheduled(product(spider), spider)
+    request = listing(spider)
+    assert list(middleware.process_spider_output(None, [request], spider)) == [request]
+    assert request.priority == 0
+    assert not budget.held
+
+
+def test_held_listings_come_back_below_low_water(spider, budget, crawled):
+    downloader = ProductBudgetMiddleware(budget)
+    products = [product(spider, n) for n in range(2)]
+    for request in products:
+        budget.request_scheduled(request, spider)
+    first, second = listing(spider, 1), listing(spider, 2)
+    assert budget.hold(first) and budget.hold(second)
+
+    downloader.process_request(products[0], spider)
+    assert budget.pending == 1
+    assert crawled == []
+    downloader.process_request(listing(spider, 3), spider)
+    assert budget.pending == 1
+    # One listing at a time, in the order they were held
+    downloader.process_request(products[1], spider)
+    assert budget.pending == 0
+    assert crawled == [first]
+    assert list(budget.held) == [second]
+
+
+def test_dropped_products_leave_the_count(spider, budget):
+    request = product(spider)
+    budget.request_scheduled(request, spider)
+    budget.request_scheduled(listing(spider), spider)
+    assert budget.pending == 1
+    budget.request_dropped(request, spider)
+    assert budget.pending == 0
+
+
+def test_idle_releases_everything(spider, budget, crawled):
+    for n in range(2):
+        budget.request_scheduled(product(spider, n), spider)
+    held = [listing(spider, n) for n in range(3)]
+    for request in held:
+        assert budget.hold(request)
+    with pytest.raises(DontCloseSpider):
+        budget.spider_idle(spider)
+    assert crawled == held
+    assert not budget.held
+    # Nothing held: the spider may close
+    budget.spider_idle(spider)
@@ -0,0 +1,68 @@
+import hashlib
+import os
+
+import pytest
+from scrapy import Request
+
+from tutorial.dupefilter import BloomDupeFilter, BloomLayer
+
+
+def fingerprints(prefix, count):
+    return [hashlib.sha1(f"{prefix}-{i}".encode()).digest() for i in range(count)]
+
+
+def false_positive_rate(contains, count=50000):
+    return sum(contains(fp) for fp in fingerprints("unseen", count)) / count
+
+
+def test_layer_stays_under_its_error_rate():
+    layer = BloomLayer(capacity=10000, error_rate=0.01)
+    for fp in fingerprints("seen", 10000):
+        layer.add(fp)
+    assert all(fp in layer for fp in fingerprints("seen", 10000))
+    # Measured rate is close to the target; leave room for chance
+    assert false_positive_rate(layer.__contains__) < 0.015
+
+
+def test_layer_count_is_estimated_from_the_bits():
+    layer = BloomLayer(capacity=10000, error_rate=0.01)
+    for fp in fingerprints("seen", 5000):
+        layer.add(fp)
+    assert layer.estimate_count() == pytest.approx(5000, rel=0.05)
+
+
+def test_scalable_filter_stays_under_the_overall_error_rate():
+    dupefilter = BloomDupeFilter(capacity=2000, error_rate=0.01)
+    requests = [Request(f"https://example.com/product/{i}") for i in range(10000)]
+    # New requests wrongly taken as seen are the filter's false positives
+    dropped = sum(dupefilter.request_seen(request) for request in requests)
+    assert dropped < 0.015 * len(requests)
+    assert len(dupefilter.layers) == 3  # 2000 + 4000 + 8000
+    assert all(dupefilter.request_seen(request) for request in requests[::50])
+
+    def seen(fp):
+        return any(fp in layer for layer in dupefilter.layers)
+
+    assert false_positive_rate(seen) < 0.015
+    dupefilter.close("finished")
+
+
+def test_filter_survives_a_restart(tmp_path):
+    jobdir = str(tmp_path)
+    requests = [Request(f"https://example.com/product/{i}") for i in range(350)]
+    dupefilter = BloomDupeFilter(jobdir, capacity=100, error_rate=1e-4)
+    for request in requests:
+        dupefilter.request_seen(request)
+    assert len(dupefilter.layers) == 3
+    dupefilter.close("shutdown")
+    assert sorted(os.listdir(os.path.join(jobdir, "requests.bloom"))) == [
+        "layer-0.bits", "layer-1.bits", "layer-2.bits", "layers.json"
+    ]
+
+    resumed = BloomDupeFilter(jobdir, capacity=100, error_rate=1e-4)
+    assert [layer.capacity for layer in resumed.layers] == [100, 200, 400]
+    assert all(resumed.request_seen(request) for request in requests)
+    assert not resumed.request_seen(Request("https://example.com/product/new"))
+    # The last layer's count is restored, so it fills up where it left off
+    assert resumed.layers[-1].count == pytest.approx(50, abs=3)
+    resumed.close("finished")
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from tutorial.exporters import ArrowItemExporter, ParquetItemExporter, offer_schema
+from tutorial.items import ProteinOffer
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def export(exporter_class, items, **kwargs):
+    f = io.BytesIO()
+    exporter = exporter_class(f, **kwargs)
+    exporter.start_exporting()
+    for item in items:
+        exporter.export_item(item)
+    exporter.finish_exporting()
+    return f.getvalue()
+
+
+def read_parquet(data):
+    return pq.read_table(io.BytesIO(data))
+
+
+def test_offers_keep_their_schema_across_batches():
+    offers = [ProteinOffer(vendor="v", name=f"p{i}", quantities=[float(i)], units=["ug"]) for i in range(5)]
+    table = read_parquet(export(ParquetItemExporter, offers, batch_size=2))
+    assert table.schema == offer_schema()
+    assert table.column("name").to_pylist() == ["p0", "p1", "p2", "p3", "p4"]
+    assert table.column("quantities").to_pylist() == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+
+
+def test_dict_items_with_different_fields():
+    items = [{"a": 1}, {"b": "x"}, {"a": 3, "b": "z"}]
+    table = read_parquet(export(ParquetItemExporter, items))
+    assert table.to_pydict() == {"a": [1, None, 3], "b": [None, "x", "z"]}
+
+
+def test_fields_unknown_to_the_first_batch_are_dropped():
+    items = [{"a": 1}, {"a": 2, "b": "new"}]
+    table = read_parquet(export(ParquetItemExporter, items, batch_size=1))
+    assert table.to_pydict() == {"a": [1, 2]}
+
+
+def test_empty_crawl_leaves_a_readable_file():
+    table = read_parquet(export(ParquetItemExporter, []))
+    assert table.num_rows == 0
+    assert table.schema == offer_schema()
+
+    table = read_parquet(export(ParquetItemExporter, [], fields_to_export={"name": "Name", "units": "Units"}))
+    assert table.schema.names == ["Name", "Units"]
+    assert table.schema.field("Units").type == pa.list_(pa.string())
+
+
+def test_arrow_file():
+    data = export(ArrowItemExporter, [ProteinOffer(vendor="v", price_values=[9.5])])
+    table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    assert table.column("price_values").to_pylist() == [[9.5]]
@@ -0,0 +1,35 @@
+from scrapy.http import HtmlResponse
+
+from tutorial.extract import ListingLink, listing_links
+
+LISTING = b"""
+<ul>
+  <li><a class="product" href="/p/1" data-sku="A-1" data-vendor="acme">IL-6 <b>human</b></a></li>
+  <li><a class="product">Discontinued</a></li>
+  <li><a class="product" href="/p/2">  </a></li>
+  <li><a class="product" href="https://example.com/p/3">
+        <span>TNF</span> <em>alpha</em> <span>mouse</span>
+      </a></li>
+</ul>
+"""
+
+
+def anchors(selector="a.product"):
+    return HtmlResponse("https://example.com/list", body=LISTING).css(selector)
+
+
+def test_links_are_paired_with_their_own_text():
+    assert listing_links(anchors()) == [
+        ListingLink("/p/1", "IL-6 human", {"sku": "A-1", "vendor": "acme"}),
+        ListingLink("/p/2", "", {}),
+        ListingLink("https://example.com/p/3", "TNF alpha mouse", {}),
+    ]
+
+
+def test_text_selector_relative_to_the_anchor():
+    links = listing_links(anchors(), text="span::text")
+    assert [link.text for link in links] == ["", "", "TNF mouse"]
+
+
+def test_no_anchors():
+    assert listing_links(anchors("a.missing")) == []
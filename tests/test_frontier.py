@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from tutorial.frontier import Frontier, FrontierAckMiddleware, FrontierScheduler
+from tutorial.pagination import Paginator
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "frontier.sqlite3")
+
+
+def test_push_is_deduplicated_by_fingerprint(path):
+    frontier = Frontier(path, "a")
+    assert frontier.push("fp1", 0, b"one")
+    assert not frontier.push("fp1", 5, b"again")
+    assert frontier.lease()[1:] == (b"one", 0)
+    assert frontier.lease() is None
+
+
+def test_lease_takes_highest_priority_first(path):
+    frontier = Frontier(path, "a")
+    frontier.push("low", 0, b"low")
+    frontier.push("high", 10, b"high")
+    frontier.push("low2", 0, b"low2")
+    assert [frontier.lease()[1] for _ in range(3)] == [b"high", b"low", b"low2"]
+
+
+def test_a_leased_request_goes_to_one_worker_only(path):
+    first, second = Frontier(path, "a"), Frontier(path, "b")
+    first.push("fp", 0, b"data")
+    assert first.lease() is not None
+    assert second.lease() is None
+    assert second.has_pending()
+
+
+def test_done_requests_are_never_leased_again(path):
+    frontier = Frontier(path, "a")
+    frontier.push("fp", 0, b"data")
+    request_id, _, _ = frontier.lease()
+    frontier.done(request_id)
+    assert frontier.lease() is None
+    assert not frontier.has_pending()
+    assert not frontier.push("fp", 0, b"data")
+
+
+def test_expired_leases_are_reclaimed(path):
+    crashed, other = Frontier(path, "a", lease_secs=-1), Frontier(path, "b")
+    crashed.push("fp", 0, b"data")
+    request_id, _, attempts = crashed.lease()
+    assert attempts == 0
+    assert other.lease() == (request_id, b"data", 1)
+
+
+def test_renewed_leases_are_kept(path):
+    worker, other = Frontier(path, "a", lease_secs=-1), Frontier(path, "b")
+    worker.push("fp", 0, b"data")
+    request_id, _, _ = worker.lease()
+    worker.lease_secs = 300
+    worker.renew([request_id])
+    assert other.lease() is None
+
+
+def test_release_hands_leases_back(path):
+    worker, other = Frontier(path, "a"), Frontier(path, "b")
+    worker.push("fp", 0, b"data")
+    worker.lease()
+    worker.release()
+    assert other.lease()[1:] == (b"data", 1)
+
+
+class FrontierSpider(Spider):
+    name = "frontier"
+
+
+@pytest.fixture
+def schedulers(path):
+    opened = []
+
+    def open_scheduler():
+        crawler = get_crawler(FrontierSpider, {"FRONTIER_PATH": path})
+        scheduler = FrontierScheduler.from_crawler(crawler)
+        scheduler.open(FrontierSpider())
+        opened.append(scheduler)
+        return scheduler
+
+    yield open_scheduler
+    for scheduler in opened:
+        scheduler.close("finished")
+
+
+def listing(page_num):
+    return Request(
+        f"https://example.com/list?page={page_num}",
+        meta={"pagination_key": "listing", "page_num": page_num},
+        dont_filter=True,
+    )
+
+
+def test_workers_share_listing_pages(schedulers):
+    first, second = schedulers(), schedulers()
+    assert first.enqueue_request(listing(1))
+    assert not second.enqueue_request(listing(1))
+    assert second.enqueue_request(listing(2))
+
+
+def test_retries_bypass_the_frontier_dupefilter(schedulers):
+    scheduler = schedulers()
+    scheduler.enqueue_request(listing(1))
+    leased = scheduler.next_request()
+    request_id = leased.meta["frontier_id"]
+    assert len(scheduler) == 1
+
+    retry = leased.replace(dont_filter=True)
+    assert scheduler.enqueue_request(retry)
+    # The retry takes over from the leased request
+    assert len(scheduler) == 0
+    assert scheduler.next_request().meta["frontier_id"] != request_id
+    assert scheduler.next_request() is None
+
+
+def test_ack_marks_the_request_done(schedulers):
+    scheduler = schedulers()
+    scheduler.enqueue_request(Request("https://example.com/product/1"))
+    request = scheduler.next_request()
+    assert scheduler.has_pending_requests()
+    scheduler.finish(request)
+    assert not scheduler.has_pending_requests()
+
+
+def test_paginators_of_two_workers_cover_every_page_once():
+    pushed, queue, order = set(), [], []
+
+    def push(paginator, pages):
+        for page in pages:
+            if page in pushed:
+                paginator.handed_off(page)  # what request_dropped does
+            else:
+                pushed.add(page)
+                queue.append(page)
+
+    workers = [Paginator("listing", lambda page: page, window=1, last_page=10) for _ in range(2)]
+    for paginator in workers:
+        push(paginator, paginator.fill())
+    turn = 0
+    while queue:
+        page = queue.pop(0)
+        order.append(page)
+        # Pages alternate between the workers, whichever issued them
+        paginator = workers[turn % 2]
+        push(paginator, paginator.done(page, has_results=True))
+        turn += 1
+    assert order == list(range(1, 11))
+
+
+def test_request_is_done_once_its_output_is_consumed(schedulers):
+    scheduler = schedulers()
+    scheduler.enqueue_request(Request("https://example.com/product/1"))
+    request = scheduler.next_request()
+    response = HtmlResponse(request.url, request=request)
+    crawler = SimpleNamespace(frontier_scheduler=scheduler)
+    output = FrontierAckMiddleware(crawler).process_spider_output(response, iter([{"item": 1}, {"item": 2}]), None)
+
+    next(output)
+    # A worker dying here leaves the lease to run out
+    assert len(scheduler) == 1
+    assert list(output) == [{"item": 2}]
+    assert len(scheduler) == 0
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+
+import pandas as pd
+
+from tutorial.matching import SymbolMatcher, normalize_names
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scrape-filtered-list.py")
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location("scrape_filtered_list", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_overlapping_symbols_are_all_found():
+    matcher = SymbolMatcher(["he", "she", "his", "hers"])
+    assert matcher.find("ushers") == ["he", "she", "hers"]
+
+
+def test_symbol_inside_another_through_failure_links():
+    matcher = SymbolMatcher(["il10ra", "l10", "ra"])
+    assert matcher.find("humanil10ra") == ["il10ra", "l10", "ra"]
+
+
+def test_results_follow_the_symbol_list_and_skip_duplicates():
+    matcher = SymbolMatcher(["tnf", "il6", "", "tnf"])
+    assert matcher.symbols == ["tnf", "il6"]
+    assert matcher.find("il6andtnf") == ["tnf", "il6"]
+    assert matcher.find("nothing here") == []
+
+
+def test_find_all_normalises_names():
+    matcher = SymbolMatcher(normalize_names(["IL-6", "TNF alpha"]))
+    found = matcher.find_all(["Human IL-6 Protein", None, "Recombinant TNF-Alpha"])
+    assert found.tolist() == [["il6"], [], ["tnfalpha"]]
+
+
+def write_sheet(path, columns):
+    pd.DataFrame(columns).to_excel(path, sheet_name="vendor", index=False)
+
+
+def test_filter_reads_the_name_column_by_header(tmp_path):
+    script = load_script()
+    path = str(tmp_path / "scrape.xlsx")
+    # Name is the third column, as in exports with vendor and catalog_no first
+    write_sheet(path, {"vendor": ["a", "a"], "catalog_no": ["IL6", "X1"], "name": ["Human TNF", "Mouse IL-6"]})
+    sheets = script.filter_scrape_data(path, script.substring_matches({"il6": "IL6"}))
+    assert sheets["vendor"]["name"].tolist() == ["Mouse IL-6"]
+    assert sheets["vendor"]["Matched symbols"].tolist() == ["IL6"]
+
+
+def test_filter_skips_sheets_without_a_name_column(tmp_path, capsys):
+    script = load_script()
+    path = str(tmp_path / "scrape.xlsx")
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"vendor": ["a"], "key": ["IL6"], "url": ["x"]}).to_excel(writer, sheet_name="removed", index=False)
+        pd.DataFrame({"name": ["Mouse IL-6", "Human TNF"]}).to_excel(writer, sheet_name="vendor", index=False)
+    sheets = script.filter_scrape_data(path, script.substring_matches({"il6": "IL6"}))
+    assert list(sheets) == ["vendor"]
+    assert sheets["vendor"]["name"].tolist() == ["Mouse IL-6"]
+    assert "'removed'" in capsys.readouterr().out
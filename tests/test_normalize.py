@@ -0,0 +1,66 @@
+import csv
+import io
+
+import pytest
+
+from tutorial.exporters import OfferCsvItemExporter
+from tutorial.items import ProteinOffer
+from tutorial.normalize import normalize_offers
+
+
+def offer(sizes="", prices=""):
+    return ProteinOffer(vendor="test", sizes=sizes, prices=prices)
+
+
+def test_sizes_and_prices_are_parsed_per_offer():
+    first, second = normalize_offers([offer("10 µg/1 mg", "$100/$1,200.50"), offer("0.5 MG", "45")])
+    assert first.quantities == [10.0, 1.0]
+    assert first.units == ["ug", "mg"]
+    assert first.price_values == [100.0, 1200.5]
+    assert second.quantities == [0.5]
+    assert second.units == ["mg"]
+    assert second.price_values == [45.0]
+
+
+def test_both_micro_signs_become_u():
+    (result,) = normalize_offers([offer("5 μg/5 µl")])
+    assert result.units == ["ug", "ul"]
+
+
+def test_thousands_separators():
+    (result,) = normalize_offers([offer("1,000 ug", "$2,500")])
+    assert result.quantities == [1000.0]
+    assert result.price_values == [2500.0]
+
+
+def test_inline_prices_when_there_is_no_price_list():
+    (result,) = normalize_offers([offer("5 ug $99/25 ug $299")])
+    assert result.quantities == [5.0, 25.0]
+    assert result.price_values == [99.0, 299.0]
+
+
+def test_unparsable_parts_are_dropped():
+    empty, bulk = normalize_offers([offer(), offer("Buy in bulk/10 ug", "Inquire/$80")])
+    assert (empty.quantities, empty.units, empty.price_values) == ([], [], [])
+    assert bulk.quantities == [10.0]
+    assert bulk.price_values == [80.0]
+
+
+@pytest.mark.parametrize("field", ["quantities", "units", "price_values", "gene_symbols"])
+def test_csv_joins_every_list_field_with_slashes(field):
+    item = offer("10 ug/1 mg", "$100/$1,200.50")
+    normalize_offers([item])
+    item.gene_symbols = ["IL10", "IL10RA"]
+    f = io.BytesIO()
+    exporter = OfferCsvItemExporter(f)
+    exporter.start_exporting()
+    exporter.export_item(item)
+    exporter.finish_exporting()
+    (row,) = csv.DictReader(io.StringIO(f.getvalue().decode()))
+    expected = {
+        "quantities": "10.0/1.0",
+        "units": "ug/mg",
+        "price_values": "100.0/1200.5",
+        "gene_symbols": "IL10/IL10RA",
+    }
+    assert row[field] == expected[field]
@@ -0,0 +1,76 @@
+from tutorial.pagination import PaginationMixin, Paginator, page_url
+
+
+def paginator(**kwargs):
+    return Paginator("listing", lambda page: page, **kwargs)
+
+
+def test_page_url_sets_the_page_parameter():
+    assert page_url("https://example.com/list?q=il6&page=1", 3) == "https://example.com/list?q=il6&page=3"
+
+
+def test_window_runs_ahead_of_the_furthest_page():
+    walk = paginator(window=3)
+    assert walk.fill() == [1, 2, 3]
+    assert walk.done(1, has_results=True) == [4]
+    assert walk.failed(2) == [5]
+    assert walk.done(5, has_results=True, total=95, per_page=20) == []
+    assert walk.end == 6
+    assert walk.is_cancelled(6) and not walk.is_cancelled(4)
+
+
+def test_slow_pages_hold_the_window():
+    walk = paginator(window=3)
+    walk.fill()
+    # Page 3 comes back while 1 and 2 are still loading
+    assert walk.done(3, has_results=True) == [4]
+    assert walk.done(4, has_results=True) == [5]
+    assert walk.in_flight == {1, 2, 5}
+    # Far pages finishing first don't open the window any further
+    assert walk.done(5, has_results=True) == [6]
+    assert walk.done(6, has_results=True) == [7]
+    assert walk.in_flight == {1, 2, 7}
+    assert walk.done(1, has_results=True) == [8]
+
+
+def test_pages_of_other_workers_move_the_walk_on():
+    walk = paginator(window=2)
+    assert walk.fill() == [1, 2]
+    walk.handed_off(2)
+    # Page 3 was issued by another worker, which also took page 1
+    assert walk.done(3, has_results=True) == [4, 5]
+
+
+def test_empty_page_ends_the_walk():
+    walk = paginator(window=2, last_page=10)
+    walk.fill()
+    assert walk.done(2, has_results=False) == []
+    assert walk.in_flight == {1}
+    assert walk.done(1, has_results=True) == []
+    assert walk.finished
+
+
+class ListingSpider(PaginationMixin):
+    def __init__(self, state=None):
+        if state is not None:
+            self.state = state
+
+
+def test_cursors_are_resumed_from_spider_state():
+    state = {}
+    spider = ListingSpider(state)
+    assert spider.start_paginators({"listing": paginator(window=2)}) == [1, 2]
+    spider.paginators["listing"].done(1, has_results=True)
+    spider.save_cursor("listing")
+
+    resumed = ListingSpider(state)
+    # Pages 2 and 3 are still in the job's queue, so nothing is issued again
+    assert resumed.start_paginators({"listing": paginator(window=2)}) == []
+    assert resumed.paginators["listing"].done(2, has_results=True) == [4]
+    assert resumed.paginators["listing"].in_flight == {3, 4}
+
+
+def test_no_state_without_jobdir():
+    spider = ListingSpider()
+    assert spider.start_paginators({"listing": paginator(window=2)}) == [1, 2]
+    assert not hasattr(spider, "state")
@@ -0,0 +1,100 @@
+import pytest
+from twisted.internet import defer
+
+from tutorial import proxypool
+from tutorial.proxypool import ProxyPool
+
+FAST, SLOW, DEAD = "http://1.1.1.1:80", "http://2.2.2.2:80", "http://3.3.3.3:80"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(proxypool.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+@pytest.fixture
+def pool(tmp_path, clock):
+    path = tmp_path / "proxy-list.txt"
+    path.write_text("1.1.1.1:80\n2.2.2.2:80\n3.3.3.3:80\n")
+    return ProxyPool(str(path), max_failures=3, backoff_base=30, backoff_max=100, explore=0)
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    results = {}
+    monkeypatch.setattr(proxypool, "deferToThread", lambda f, *args: defer.succeed(f(*args)))
+    monkeypatch.setattr(proxypool, "check_proxy", lambda proxy, url, timeout: results[proxy])
+    return results
+
+
+def test_validation_quarantines_and_ranks_dead_proxies_last(pool, clock, checks):
+    checks.update({FAST: ("9.9.9.9", 0.2), SLOW: ("9.9.9.9", 2.0), DEAD: (None, 0.1)})
+    pool.validate(timeout=5)
+    dead = pool.proxies[DEAD]
+    assert not dead.is_healthy(clock[0])
+    assert dead.failures == 1
+    assert dead.latency == 5
+    assert pool.get_proxy() == FAST
+
+    # Released after its quarantine, it still ranks behind every healthy proxy
+    clock[0] += 31
+    assert dead.is_healthy(clock[0])
+    pool.quarantine(pool.proxies[FAST])
+    assert pool.get_proxy() == SLOW
+
+
+def test_unmeasured_proxies_rank_last(pool):
+    pool.record_success(SLOW, None, 3.0)
+    assert pool.get_proxy() == SLOW
+
+
+def test_score_weighs_latency_by_success_rate(pool):
+    pool.record_success(FAST, None, 1.0)
+    pool.record_failure(FAST)
+    pool.record_failure(FAST)
+    pool.record_success(SLOW, None, 1.5)
+    assert ProxyPool.score(pool.proxies[FAST]) == pytest.approx(3.0)
+    assert pool.get_proxy() == SLOW
+
+
+def test_domain_latency_wins_over_the_overall_one(pool):
+    pool.record_success(FAST, None, 0.5)
+    pool.record_success(SLOW, "example.com", 0.1)
+    pool.record_success(SLOW, None, 5.0)
+    assert pool.get_proxy("example.com") == SLOW
+    assert pool.get_proxy("other.com") == FAST
+
+
+def test_repeated_quarantines_back_off(pool, clock):
+    state = pool.proxies[FAST]
+    backoffs = []
+    for _ in range(4):
+        for _ in range(3):
+            pool.record_failure(FAST)
+        backoffs.append(state.quarantined_until - clock[0])
+        clock[0] = state.quarantined_until
+    assert backoffs == [30, 60, 100, 100]
+
+    pool.record_success(FAST, None, 0.3)
+    for _ in range(3):
+        pool.record_failure(FAST)
+    assert state.quarantined_until - clock[0] == 30
+
+
+def test_everything_quarantined_uses_the_first_one_back(pool, clock):
+    for server in (FAST, SLOW, DEAD):
+        pool.quarantine(pool.proxies[server])
+        clock[0] += 1
+    assert pool.get_proxy() == FAST
+
+
+def test_reload_keeps_the_state_of_listed_proxies(pool, clock, tmp_path):
+    pool.record_success(FAST, None, 0.2)
+    (tmp_path / "proxy-list.txt").write_text("1.1.1.1:80\n4.4.4.4:80\n")
+    pool.mtime = -1  # as if the file changed
+    clock[0] += 31
+    assert pool.maybe_reload()
+    assert set(pool.proxies) == {FAST, "http://4.4.4.4:80"}
+    assert pool.proxies[FAST].successes == 1
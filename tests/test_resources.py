@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from scrapy.settings import Settings
+
+from tutorial.resources import HostSuffixTrie, ResourcePolicy
+
+
+def browser_request(url, resource_type="script", navigation=False, parent_frame=None):
+    """Stand-in for a Playwright request, with what the policy looks at."""
+    return SimpleNamespace(
+        url=url,
+        resource_type=resource_type,
+        is_navigation_request=lambda: navigation,
+        frame=SimpleNamespace(parent_frame=parent_frame),
+    )
+
+
+def test_suffix_trie_matches_whole_labels():
+    trie = HostSuffixTrie(["clarity.ms", ".Doubleclick.net"])
+    assert trie.match("clarity.ms") == "clarity.ms"
+    assert trie.match("e.clarity.ms") == "clarity.ms"
+    assert trie.match("stats.g.doubleclick.net") == ".Doubleclick.net"
+    assert trie.match("notclarity.ms") is None
+    assert trie.match("ms") is None
+    assert trie.match("example.com") is None
+    assert HostSuffixTrie().match("clarity.ms") is None
+
+
+def test_empty_policy_is_false():
+    assert not ResourcePolicy()
+    assert not ResourcePolicy.from_settings(Settings())
+    assert ResourcePolicy(domains=["clarity.ms"])
+    assert ResourcePolicy(url_patterns=["/analytics"])
+
+
+def test_rules():
+    policy = ResourcePolicy(
+        types=["image", "font"],
+        domains=["clarity.ms"],
+        extensions=[".WOFF2", "mp4"],
+        url_patterns=["/collect?", "/pixel/"],
+    )
+    assert policy.match(browser_request("https://example.com/logo.png", "image")) == "type/image"
+    assert policy.match(browser_request("https://e.clarity.ms/tag.js")) == "domain/clarity.ms"
+    assert policy.match(browser_request("https://example.com/f/x.WOFF2", "other")) == "extension/woff2"
+    assert policy.match(browser_request("https://example.com/v/intro.mp4?t=1", "media")) == "extension/mp4"
+    assert policy.match(browser_request("https://example.com/g/collect?v=2", "xhr")) == "url_pattern"
+    # Patterns are literal text, not regular expressions
+    assert policy.match(browser_request("https://example.com/g/collectv=2", "xhr")) is None
+    assert policy.match(browser_request("https://example.com/app.js")) is None
+
+
+def test_main_frame_document_is_never_blocked():
+    policy = ResourcePolicy(types=["document"], domains=["example.com"])
+    page = browser_request("https://example.com/p/1", "document", navigation=True)
+    assert policy.match(page) is None
+    iframe = browser_request("https://example.com/ad", "document", navigation=True, parent_frame=object())
+    assert policy.match(iframe) == "type/document"
+
+
+def test_requests_without_a_frame_are_subrequests():
+    policy = ResourcePolicy(types=["document"])
+    request = browser_request("https://example.com/sw.js", "document", navigation=True)
+    del request.frame
+    assert policy.match(request) == "type/document"
+
+
+def test_from_settings():
+    settings = Settings(
+        {
+            "RESOURCE_BLOCK_TYPES": "image,font",
+            "RESOURCE_BLOCK_DOMAINS": ["clarity.ms"],
+            "RESOURCE_BLOCK_BYTES_ESTIMATE": {"image": 1},
+        }
+    )
+    policy = ResourcePolicy.from_settings(settings)
+    assert policy.types == {"image", "font"}
+    assert policy.bytes_estimate == {"image": 1}
+    assert policy.match(browser_request("https://www.clarity.ms/s/0.7.js")) == "domain/clarity.ms"
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from tutorial.middlewares import PlaywrightProxyMiddleware, StaticFirstMiddleware
+from tutorial.proxypool import ProxyPool
+
+PROXY = "http://1.1.1.1:80"
+
+
+class ProductSpider(Spider):
+    name = "products"
+    static_first_selectors = {"parse_product": ["h1.title"]}
+
+    def parse_product(self, response):
+        pass
+
+
+@pytest.fixture
+def spider():
+    return ProductSpider()
+
+
+@pytest.fixture
+def middlewares(tmp_path):
+    path = tmp_path / "proxy-list.txt"
+    path.write_text("1.1.1.1:80\n")
+    proxies = PlaywrightProxyMiddleware(ProxyPool(str(path), explore=0), validate_on_start=False)
+    proxies.ip_cache[PROXY] = ("9.9.9.9", time.monotonic())
+    stats = MemoryStatsCollector(get_crawler(ProductSpider))
+    return StaticFirstMiddleware(stats), proxies
+
+
+def product_request(spider):
+    return Request("https://example.com/p/1", callback=spider.parse_product, meta={"playwright": True})
+
+
+def send(middlewares, request, spider):
+    for middleware in middlewares:
+        assert middleware.process_request(request, spider) is None
+
+
+def test_static_attempt_goes_through_the_proxy_pool(middlewares, spider):
+    request = product_request(spider)
+    send(middlewares, request, spider)
+    assert request.meta["playwright"] is False
+    assert request.meta["proxy"] == PROXY
+    assert "playwright_context_kwargs" not in request.meta
+
+
+def test_complete_static_html_is_kept(middlewares, spider):
+    static_first, proxies = middlewares
+    request = product_request(spider)
+    send(middlewares, request, spider)
+    response = HtmlResponse(request.url, body=b"<h1 class='title'>IL-6</h1>", request=request)
+    assert static_first.process_response(request, response, spider) is response
+    proxies.process_response(request, response, spider)
+    assert proxies.pool.proxies[PROXY].successes == 1
+
+
+def test_missing_selectors_escalate_to_the_browser(middlewares, spider):
+    static_first, _ = middlewares
+    request = product_request(spider)
+    send(middlewares, request, spider)
+    response = HtmlResponse(request.url, body=b"<div id='app'></div>", request=request)
+    rendered = static_first.process_response(request, response, spider)
+    assert rendered.meta["playwright"] is True
+    assert "proxy" not in rendered.meta
+
+    send(middlewares, rendered, spider)
+    assert rendered.meta["playwright"] is True
+    assert rendered.meta["playwright_context_kwargs"] == {"proxy": {"server": PROXY}}
+    assert "proxy" not in rendered.meta
+
+
+def test_requests_without_selectors_are_rendered(middlewares, spider):
+    request = Request("https://example.com/list", callback=spider.parse, meta={"playwright": True})
+    send(middlewares, request, spider)
+    assert request.meta["playwright"] is True
+    assert "proxy" not in request.meta
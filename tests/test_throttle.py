@@ -0,0 +1,53 @@
+import pytest
+
+from tutorial import throttle
+from tutorial.throttle import DomainRateController, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def test_burst_then_queue_in_order(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    assert [bucket.take() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.2])
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    bucket.take()
+    bucket.take()
+    clock[0] += 60
+    assert [bucket.take() for _ in range(3)] == pytest.approx([0, 0, 0.1])
+
+
+def test_pause_delays_every_token(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(30)
+    assert bucket.take() == pytest.approx(30)
+    clock[0] += 30
+    assert bucket.take() == 0
+
+
+def test_controller_backs_off_and_stays_within_bounds(clock):
+    controller = DomainRateController(start_rate=1, min_rate=0.1, max_rate=1.05, max_concurrency=4, window=2)
+    for _ in range(10):
+        controller.on_success(latency=0.5)
+    assert controller.rate == pytest.approx(1.05)
+    assert controller.concurrency == 4
+    controller.on_throttled()
+    assert controller.rate == pytest.approx(0.525)
+    assert controller.concurrency == 2
+    for _ in range(10):
+        controller.on_throttled()
+    assert controller.rate == pytest.approx(0.1)
+    assert controller.concurrency == 1
+
+
+def test_slow_responses_hold_the_rate(clock):
+    controller = DomainRateController(start_rate=1, min_rate=0.1, max_rate=10, max_concurrency=4, target_latency=5)
+    controller.on_success(latency=9)
+    assert controller.rate == 1
@@ -0,0 +1,166 @@
+import json
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from tutorial import extensions, middlewares, timing
+from tutorial.extensions import PhaseTimingExtension
+from tutorial.middlewares import PhaseTimingMiddleware, PhaseTimingSpiderMiddleware
+from tutorial.timing import Histogram, PhaseTimings, record_navigation
+
+
+class CatalogSpider(Spider):
+    name = "catalog"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [100.0]
+    for module in (timing, extensions, middlewares):
+        monkeypatch.setattr(module, "now", lambda: clock[0])
+    return clock
+
+
+@pytest.fixture
+def spider():
+    return CatalogSpider()
+
+
+@pytest.fixture
+def timings():
+    return PhaseTimings()
+
+
+@pytest.fixture
+def stats():
+    return MemoryStatsCollector(get_crawler(CatalogSpider))
+
+
+def summary(timings, phase, domain="example.com"):
+    return timings.report()[domain][phase]
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    for _ in range(99):
+        histogram.add(1.0)
+    histogram.add(10.0)
+    # Upper edge of the bucket: within one bucket (about 9%) of the value
+    assert 1.0 <= histogram.quantile(0.5) < 1.1
+    assert 1.0 <= histogram.quantile(0.99) < 1.1
+    assert histogram.quantile(1.0) == 10.0
+    assert histogram.summary() == {
+        "count": 100,
+        "mean": 1.09,
+        "p50": round(histogram.quantile(0.5), 4),
+        "p95": round(histogram.quantile(0.95), 4),
+        "p99": round(histogram.quantile(0.99), 4),
+        "max": 10.0,
+    }
+
+
+def test_histogram_quantile_capped_at_max():
+    histogram = Histogram()
+    histogram.add(0.5)
+    histogram.add(-1.0)
+    assert histogram.quantile(0.99) == 0.5
+    assert Histogram().summary()["mean"] == 0
+
+
+def test_phases_count_per_domain_and_overall(timings, stats):
+    timings.add("https://example.com/p/1", "callback", 0.5)
+    timings.add("https://other.org/p/1", "callback", 0.25)
+    timings.add_span("https://example.com/p/1", "queue", {"scheduled": 1.0, "dequeued": 3.0}, "scheduled", "dequeued")
+    # A boundary that was never marked adds nothing
+    timings.add_span("https://example.com/p/1", "navigation", {"navigation_start": 1.0}, "navigation_start", "navigation_end")
+    report = timings.report()
+    assert set(report) == {"all", "example.com", "other.org"}
+    assert set(report["example.com"]) == {"callback", "queue"}
+    assert report["all"]["callback"]["count"] == 2
+    assert report["example.com"]["queue"]["max"] == 2.0
+    timings.to_stats(stats)
+    assert stats.get_value("timing/example.com/queue/max") == 2.0
+    assert stats.get_value("timing/all/callback/count") == 2
+
+
+def test_http_request_phases(clock, spider, timings):
+    extension = PhaseTimingExtension(timings, None, None)
+    request = Request("https://example.com/p/1")
+    extension.request_scheduled(request, spider)
+    clock[0] += 2.0
+    PhaseTimingMiddleware().process_request(request, spider)
+    clock[0] += 0.5
+    extension.request_reached_downloader(request, spider)
+    clock[0] += 1.0
+    extension.request_left_downloader(request, spider)
+    assert summary(timings, "queue")["max"] == 2.0
+    assert summary(timings, "middlewares")["max"] == 0.5
+    assert summary(timings, "slot_and_download")["max"] == 1.0
+    assert "navigation" not in timings.report()["example.com"]
+
+
+def test_playwright_request_phases(clock, spider, timings):
+    extension = PhaseTimingExtension(timings, None, None)
+    request = Request("https://example.com/p/1", meta={"playwright": True})
+    extension.request_scheduled(request, spider)
+    PhaseTimingMiddleware().process_request(request, spider)
+    assert record_navigation in request.meta["playwright_page_init_callback"].callbacks
+    extension.request_reached_downloader(request, spider)
+    times = request.meta["phase_times"]
+    times["navigation_start"] = clock[0] + 1.0
+    times["navigation_end"] = clock[0] + 4.0
+    clock[0] += 4.5
+    extension.request_left_downloader(request, spider)
+    assert summary(timings, "slot_and_browser")["max"] == 1.0
+    assert summary(timings, "navigation")["max"] == 3.0
+    assert summary(timings, "page_methods")["max"] == 0.5
+    assert "slot_and_download" not in timings.report()["example.com"]
+
+
+def test_retries_are_timed_from_their_own_schedule(clock, spider, timings):
+    extension = PhaseTimingExtension(timings, None, None)
+    request = Request("https://example.com/p/1")
+    extension.request_scheduled(request, spider)
+    PhaseTimingMiddleware().process_request(request, spider)
+    clock[0] += 10.0
+    retry = request.replace(dont_filter=True)
+    extension.request_scheduled(retry, spider)
+    assert retry.meta["phase_times"] == {"scheduled": 110.0}
+    assert request.meta["phase_times"]["dequeued"] == 100.0
+
+
+def test_callback_and_pipeline_phases(clock, spider, timings):
+    middleware = PhaseTimingSpiderMiddleware(timings)
+    extension = PhaseTimingExtension(timings, None, None)
+    response = HtmlResponse("https://example.com/p/1", body=b"")
+    item = {"name": "IL-6"}
+
+    def callback():
+        clock[0] += 1.0
+        yield Request("https://example.com/p/2")
+        clock[0] += 1.0
+        yield item
+
+    out = list(middleware.process_spider_output(response, callback(), spider))
+    assert out[1] is item
+    assert summary(timings, "callback")["max"] == 2.0
+    clock[0] += 3.0
+    extension.item_done(item, spider, response=response)
+    assert summary(timings, "pipeline")["max"] == 3.0
+    # Requests aren't items, and an item is only timed once
+    extension.item_done(item, spider)
+    assert summary(timings, "pipeline")["count"] == 1
+
+
+def test_report_at_close(clock, spider, timings, stats, tmp_path):
+    path = tmp_path / "timing-%(name)s.json"
+    extension = PhaseTimingExtension(timings, stats, str(path))
+    timings.add("https://example.com/p/1", "callback", 0.5)
+    extension.spider_closed(spider)
+    assert stats.get_value("timing/example.com/callback/p50") == 0.5
+    report = json.loads((tmp_path / "timing-catalog.json").read_text())
+    assert report["spider"] == "catalog"
+    assert report["phases"]["all"]["callback"]["count"] == 1
@@ -0,0 +1,105 @@
+import os
+import pickle
+import re
+
+import pandas as pd
+
+# Runs of letters or of digits, so "IL-10", "IL10" and "il 10" all become ("il", "10")
+TOKEN_PATTERN = r"[^\W\d_]+|\d+"
+# Columns of an HGNC-style table holding other names of the symbol in the first column
+ALIAS_COLUMN_PATTERN = re.compile(r"alias|previous|synonym", re.IGNORECASE)
+ALIAS_SEPARATOR = re.compile(r"\s*[,|;]\s*")
+
+
+def tokenize(name):
+    return tuple(re.findall(TOKEN_PATTERN, str(name).lower()))
+
+
+class AliasIndex:
+    """Token index resolving protein names to canonical gene symbols.
+
+    Every symbol and alias is stored as its token tuple, in a dict from
+    tokens to symbols. A name is resolved by looking up its token windows,
+    leftmost-longest first, so aliases only match whole tokens: "IL1" is
+    not found in "IL10", and "IL-1 receptor antagonist" resolves to the
+    receptor antagonist rather than to IL-1.
+    """
+
+    def __init__(self):
+        self.index = {}  # token tuple -> tuple of symbols
+        self.lengths = []  # token counts present in the index, longest first
+
+    def add(self, symbol, aliases=()):
+        for name in (symbol, *aliases):
+            key = tokenize(name)
+            if not key:
+                continue
+            symbols = self.index.get(key, ())
+            if symbol not in symbols:
+                self.index[key] = symbols + (symbol,)
+            if len(key) not in self.lengths:
+                self.lengths = sorted({*self.lengths, len(key)}, reverse=True)
+
+    def add_symbols(self, symbols):
+        """Add list entries that aren't known names yet as symbols of their own."""
+        for symbol in symbols:
+            if tokenize(symbol) not in self.index:
+                self.add(symbol)
+
+    def lookup(self, name):
+        """Symbols whose symbol or alias is exactly ``name``."""
+        return list(self.index.get(tokenize(name), ()))
+
+    def resolve_tokens(self, tokens):
+        found = {}
+        start = 0
+        while start < len(tokens):
+            for length in self.lengths:
+                if start + length > len(tokens):
+                    continue
+                symbols = self.index.get(tuple(tokens[start:start + length]))
+                if symbols:
+                    found.update(dict.fromkeys(symbols))
+                    start += length
+                    break
+            else:
+                start += 1
+        return list(found)
+
+    def resolve(self, name):
+        """Canonical symbols named anywhere in ``name``, in order of appearance."""
+        return self.resolve_tokens(tokenize(name))
+
+    def resolve_all(self, names):
+        """``resolve`` for a whole column of names; returns a Series of lists."""
+        tokens = pd.Series(names, dtype="object").fillna("").astype(str).str.lower().str.findall(TOKEN_PATTERN)
+        return tokens.map(self.resolve_tokens)
+
+    @classmethod
+    def from_table(cls, path):
+        """Build from a CSV, TSV or Excel table: symbols in the first column,
+        aliases in the columns whose header mentions alias, previous or synonym."""
+        if path.endswith((".xlsx", ".xls")):
+            df = pd.read_excel(path, dtype=str)
+        else:
+            df = pd.read_csv(path, sep=None, engine="python", dtype=str)
+        alias_columns = [column for column in df.columns[1:] if ALIAS_COLUMN_PATTERN.search(str(column))]
+        index = cls()
+        for symbol, *aliases in df[[df.columns[0], *alias_columns]].itertuples(index=False, name=None):
+            if pd.isna(symbol):
+                continue
+            index.add(symbol, [alias for value in aliases if pd.notna(value) for alias in ALIAS_SEPARATOR.split(value) if alias])
+        return index
+
+    @classmethod
+    def load(cls, path):
+        """``from_table``, through a pickled index kept next to the table
+        and rebuilt whenever the table is newer."""
+        cache_path = path + ".index.pickle"
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        index = cls.from_table(path)
+        with open(cache_path, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return index
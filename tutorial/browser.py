@@ -0,0 +1,342 @@
+import asyncio
+import time
+
+from scrapy.utils.defer import deferred_from_coro
+from scrapy.utils.misc import load_object
+
+
+class PageInitCallbacks:
+    """Several ``playwright_page_init_callback`` hooks run in order."""
+
+    def __init__(self, *callbacks):
+        self.callbacks = list(callbacks)
+
+    async def __call__(self, page, request):
+        for callback in self.callbacks:
+            await callback(page, request)
+
+    def __reduce__(self):
+        # Middlewares add their hooks again on every download, so a retried
+        # request written to the JOBDIR queue doesn't need (or pickle) them
+        return (PageInitCallbacks, ())
+
+
+def add_page_init_callback(request, callback):
+    """Run ``callback(page, request)`` before navigation, after any existing one.
+
+    Safe to call again for a retried copy of the same request.
+    """
+    existing = request.meta.get("playwright_page_init_callback")
+    if isinstance(existing, PageInitCallbacks):
+        if callback not in existing.callbacks:
+            existing.callbacks.append(callback)
+    elif existing:
+        request.meta["playwright_page_init_callback"] = PageInitCallbacks(load_object(existing), callback)
+    else:
+        request.meta["playwright_page_init_callback"] = PageInitCallbacks(callback)
+
+
+async def record_server_latency(page, request):
+    """Store the main navigation's time to first byte in ``meta["server_latency"]``.
+
+    ``download_latency`` also counts page methods, ``slow_mo`` and
+    rendering; this is only the server's share.
+    """
+    def on_response(response):
+        if not response.request.is_navigation_request() or response.frame != page.main_frame:
+            return
+        page.remove_listener("response", on_response)
+        timing = response.request.timing
+        if timing["requestStart"] >= 0 and timing["responseStart"] >= 0:
+            request.meta["server_latency"] = (timing["responseStart"] - timing["requestStart"]) / 1000
+
+    page.on("response", on_response)
+
+
+# Chromium only; other browsers report 0 and are never recycled for memory
+JS_HEAP_SCRIPT = "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+
+class ContextSlot:
+    def __init__(self, key, name, kwargs):
+        self.key = key
+        self.name = name
+        self.kwargs = kwargs
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.uses = 0
+        self.pending = 0  # requests assigned but not yet given a page
+        self.context = None
+        self.retired = False
+        self.tabs = []  # parked pages waiting for their next navigation
+        self.page_uses = {}  # open page -> navigations served
+
+    def is_idle(self):
+        # Parked tabs don't keep a context busy
+        return self.context is not None and not self.pending and len(self.context.pages) <= len(self.tabs)
+
+
+class ContextPool:
+    """Warm browser contexts, one per ``(proxy, vendor)`` key.
+
+    Contexts are named for scrapy-playwright (``playwright_context``) and
+    reused until they have served ``max_pages`` pages or are ``max_age``
+    seconds old; the next request for the key then gets a fresh context and
+    the old one is closed once its last page is closed. At most
+    ``max_contexts`` contexts are open: idle ones are evicted least recently
+    used first, otherwise ``acquire`` waits for a page to close.
+
+    With ``tab_pool_size`` set, up to that many pages per context are kept
+    after their callback and navigated again by later requests, skipping
+    page creation and route setup. A tab is closed instead after
+    ``max_tab_uses`` navigations or once its JS heap passes
+    ``max_tab_heap`` bytes.
+    """
+
+    def __init__(self, max_pages=200, max_age=900, max_contexts=8, tab_pool_size=0,
+                 max_tab_uses=50, max_tab_heap=None, stats=None):
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.max_contexts = max_contexts
+        self.tab_pool_size = tab_pool_size
+        self.max_tab_uses = max_tab_uses
+        self.max_tab_heap = max_tab_heap
+        self.stats = stats
+        self.slots = {}  # key -> current slot
+        self.by_name = {}  # context name -> open slot, current or retired
+        self.generation = 0
+        self.released = asyncio.Event()
+
+    @classmethod
+    def from_settings(cls, settings, stats=None):
+        max_heap_mb = settings.getfloat("PLAYWRIGHT_TAB_MAX_HEAP_MB", 0)
+        return cls(
+            max_pages=settings.getint("PLAYWRIGHT_CONTEXT_MAX_PAGES", 200),
+            max_age=settings.getfloat("PLAYWRIGHT_CONTEXT_MAX_AGE", 900),
+            max_contexts=settings.getint("PLAYWRIGHT_CONTEXT_POOL_SIZE", 8),
+            tab_pool_size=settings.getint("PLAYWRIGHT_TAB_POOL_SIZE", 0),
+            max_tab_uses=settings.getint("PLAYWRIGHT_TAB_MAX_USES", 50),
+            max_tab_heap=max_heap_mb * 1024 * 1024 if max_heap_mb else None,
+            stats=stats,
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # Shared by the context middleware and the page close middleware
+        pool = getattr(crawler, "context_pool", None)
+        if pool is None:
+            pool = crawler.context_pool = cls.from_settings(crawler.settings, stats=crawler.stats)
+        return pool
+
+    async def acquire(self, proxy, vendor):
+        key = (proxy, vendor)
+        while True:
+            slot = self.slots.get(key)
+            if slot is not None and self.is_expired(slot):
+                self.retire(slot)
+                slot = None
+            if slot is not None:
+                break
+            if len(self.by_name) < self.max_contexts or self.evict_idle():
+                slot = self.new_slot(key, proxy, vendor)
+                break
+            self.released.clear()
+            await self.released.wait()
+
+        slot.uses += 1
+        slot.pending += 1
+        slot.last_used = time.monotonic()
+        return slot
+
+    def is_expired(self, slot):
+        return slot.uses >= self.max_pages or time.monotonic() - slot.created >= self.max_age
+
+    def new_slot(self, key, proxy, vendor):
+        self.generation += 1
+        name = f"{vendor}|{proxy or 'direct'}|{self.generation}"
+        kwargs = {"proxy": {"server": proxy}} if proxy else {}
+        slot = ContextSlot(key, name, kwargs)
+        self.slots[key] = slot
+        self.by_name[name] = slot
+        self.update_stats("created")
+        return slot
+
+    def retire(self, slot):
+        slot.retired = True
+        if self.slots.get(slot.key) is slot:
+            del self.slots[slot.key]
+        self.update_stats("recycled")
+        if slot.is_idle():
+            self.close(slot)
+
+    def evict_idle(self):
+        idle = [slot for slot in self.by_name.values() if slot.is_idle()]
+        if not idle:
+            return False
+        self.close(min(idle, key=lambda s: s.last_used))
+        self.update_stats("evicted")
+        return True
+
+    def close(self, slot):
+        self.forget(slot)
+        deferred_from_coro(slot.context.close())
+
+    def forget(self, slot):
+        self.by_name.pop(slot.name, None)
+        if self.slots.get(slot.key) is slot:
+            del self.slots[slot.key]
+        self.released.set()
+        self.update_stats()
+
+    def release_pending(self, name):
+        # The request failed before it got a page
+        slot = self.by_name.get(name)
+        if slot is None:
+            return
+        slot.pending = max(slot.pending - 1, 0)
+        if slot.context is None and not slot.pending:
+            self.forget(slot)
+        self.released.set()
+
+    async def on_page(self, page, request):
+        slot = self.by_name.get(request.meta.get("playwright_context"))
+        if slot is None or not request.meta.pop("context_pending", False):
+            return
+        slot.pending = max(slot.pending - 1, 0)
+        if slot.context is None:
+            slot.context = page.context
+            slot.context.on("close", lambda _: self.forget(slot))
+        if page not in slot.page_uses:
+            page.on("close", lambda _: self.on_page_closed(slot, page))
+        slot.page_uses[page] = slot.page_uses.get(page, 0) + 1
+
+    def on_page_closed(self, slot, page):
+        slot.page_uses.pop(page, None)
+        if page in slot.tabs:
+            slot.tabs.remove(page)
+        if slot.retired and slot.name in self.by_name and slot.is_idle():
+            self.close(slot)
+        self.released.set()
+
+    async def checkout(self, slot):
+        """Return a parked tab of ``slot`` to navigate again, or None."""
+        while slot.tabs:
+            page = slot.tabs.pop()
+            if page.is_closed():
+                continue
+            if self.max_tab_heap and await self.heap_size(page) > self.max_tab_heap:
+                self.update_stats("tabs_recycled")
+                await page.close()
+                continue
+            self.update_stats("tabs_reused")
+            return page
+        return None
+
+    async def heap_size(self, page):
+        try:
+            return await page.evaluate(JS_HEAP_SCRIPT)
+        except Exception:
+            # A crashed or closing tab: treat it as over the limit
+            return float("inf")
+
+    def checkin(self, page):
+        """Park ``page`` for reuse; False if it should be closed instead."""
+        if not self.tab_pool_size or page.is_closed():
+            return False
+        slot = next((s for s in self.by_name.values() if s.context is page.context), None)
+        if slot is None or slot.retired or len(slot.tabs) >= self.tab_pool_size:
+            return False
+        if slot.page_uses.get(page, 0) >= self.max_tab_uses:
+            self.update_stats("tabs_recycled")
+            return False
+        slot.tabs.append(page)
+        self.released.set()
+        return True
+
+    def update_stats(self, event=None):
+        if not self.stats:
+            return
+        if event:
+            self.stats.inc_value(f"contextpool/{event}")
+        self.stats.set_value("contextpool/open", len(self.by_name))
+
+
+class PageGuard:
+    """Counts open Playwright pages and keeps them under ``max_pages``.
+
+    A download reserves a slot before it gets a page. Once the page exists
+    the slot belongs to it and is freed when the page closes; a download
+    that never opens one (cache hit, static response, early failure) frees
+    it straight away. Pages still open when the spider closes are leaked:
+    they are counted in ``pages/leaked`` and closed.
+    """
+
+    def __init__(self, max_pages=16, stats=None):
+        self.max_pages = max_pages
+        self.stats = stats
+        self.reserved = 0
+        self.pages = set()
+        self.parked = set()  # open but idle, see ContextPool.checkin
+        self.released = asyncio.Event()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # Shared by the downloader and spider middlewares of one crawl
+        guard = getattr(crawler, "page_guard", None)
+        if guard is None:
+            guard = crawler.page_guard = cls(
+                max_pages=crawler.settings.getint("PLAYWRIGHT_MAX_OPEN_PAGES", 16),
+                stats=crawler.stats,
+            )
+        return guard
+
+    @property
+    def open(self):
+        return self.reserved + len(self.pages) - len(self.parked)
+
+    async def reserve(self):
+        while self.open >= self.max_pages:
+            self.released.clear()
+            await self.released.wait()
+        self.reserved += 1
+
+    def release(self):
+        self.reserved = max(self.reserved - 1, 0)
+        self.released.set()
+
+    async def on_page(self, page, request):
+        self.parked.discard(page)
+        if page not in self.pages:
+            self.pages.add(page)
+            page.on("close", lambda _: self.on_page_closed(page))
+            self.update_stats("opened")
+        # The slot now belongs to the page (or was not needed: the page is reused)
+        if request.meta.pop("page_reserved", False):
+            self.release()
+
+    def on_page_closed(self, page):
+        self.pages.discard(page)
+        self.parked.discard(page)
+        self.released.set()
+        self.update_stats("closed")
+
+    def park(self, page):
+        self.parked.add(page)
+        self.released.set()
+
+    def close(self, page, event="closed_by_guard"):
+        if page is None or page.is_closed():
+            return
+        self.update_stats(event)
+        deferred_from_coro(page.close()).addErrback(lambda _: None)
+
+    def close_all(self):
+        for page in list(self.pages):
+            self.close(page, event="closed_idle" if page in self.parked else "leaked")
+
+    def update_stats(self, event):
+        if not self.stats:
+            return
+        self.stats.inc_value(f"pages/{event}")
+        self.stats.set_value("pages/open", len(self.pages))
+        self.stats.max_value("pages/max_open", len(self.pages))
@@ -0,0 +1,83 @@
+from collections import deque
+
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+
+
+def request_kind(request):
+    """"product" for requests of product pages, "listing" for everything that discovers them.
+
+    ``meta["request_kind"]`` wins; otherwise callbacks named
+    ``parse_product*`` mark product requests.
+    """
+    kind = request.meta.get("request_kind")
+    if kind:
+        return kind
+    callback = getattr(request.callback, "__name__", "")
+    return "product" if callback.startswith("parse_product") else "listing"
+
+
+class ProductBudget:
+    """Product requests waiting in the scheduler, and listing requests held back.
+
+    Once ``high_water`` product requests are pending, new listing requests
+    are held here instead of being scheduled, and released again when the
+    backlog has drained below ``low_water``. Shared by ``ProductFirstMiddleware``
+    (spider side) and ``ProductBudgetMiddleware`` (downloader side).
+    """
+
+    def __init__(self, crawler, high_water=200, low_water=None):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.high_water = high_water
+        self.low_water = high_water // 2 if low_water is None else low_water
+        self.pending = 0
+        self.held = deque()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        budget = getattr(crawler, "product_budget", None)
+        if budget is None:
+            budget = crawler.product_budget = cls(
+                crawler,
+                crawler.settings.getint("PRODUCT_HIGH_WATER", 200),
+                crawler.settings.getint("PRODUCT_LOW_WATER") or None,
+            )
+            crawler.signals.connect(budget.request_scheduled, signal=signals.request_scheduled)
+            crawler.signals.connect(budget.request_dropped, signal=signals.request_dropped)
+            crawler.signals.connect(budget.spider_idle, signal=signals.spider_idle)
+        return budget
+
+    def request_scheduled(self, request, spider):
+        if request_kind(request) == "product":
+            self.pending += 1
+            self.stats.max_value("budget/max_pending_products", self.pending)
+
+    def request_dropped(self, request, spider):
+        # Filtered as a duplicate after request_scheduled counted it
+        if request_kind(request) == "product":
+            self.pending -= 1
+
+    def dequeued(self, request):
+        if request_kind(request) == "product":
+            self.pending -= 1
+            # One at a time: a listing page brings a whole page of products
+            if self.held and self.pending < self.low_water:
+                self.release(1)
+
+    def hold(self, request):
+        """Keep a listing request back while too many products are pending."""
+        if self.pending < self.high_water or request_kind(request) == "product":
+            return False
+        self.held.append(request)
+        self.stats.inc_value("budget/listings_held")
+        return True
+
+    def release(self, count):
+        for _ in range(min(count, len(self.held))):
+            self.crawler.engine.crawl(self.held.popleft())
+
+    def spider_idle(self, spider):
+        if self.held:
+            self.release(len(self.held))
+            raise DontCloseSpider
@@ -0,0 +1,233 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.spiderloader import get_spider_loader
+
+SPIDER_PACKAGE = "tutorial.spiders.proteins"
+MEMORY_CHECK_INTERVAL = 5  # seconds
+
+
+def describe(entry):
+    if entry["returncode"] is None:
+        return "not started"
+    if entry["memory_exceeded"]:
+        return "memory limit"
+    return entry["finish_reason"] or f"exit {entry['returncode']}"
+
+
+def vendor_spiders(settings):
+    """Names of the spiders in ``SPIDER_PACKAGE`` less ``CRAWLALL_EXCLUDE``, one per vendor."""
+    loader = get_spider_loader(settings)
+    excluded = set(settings.getlist("CRAWLALL_EXCLUDE"))
+    return sorted(
+        name for name in loader.list()
+        if loader.load(name).__module__.startswith(SPIDER_PACKAGE + ".") and name not in excluded
+    )
+
+
+def process_tree_rss(roots):
+    """RSS in bytes of each pid in ``roots`` together with all its descendants.
+
+    Reads ``/proc``, so Chromium and its renderer processes count towards
+    the worker that started them.
+    """
+    children = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm", encoding="utf-8") as f:
+                pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue  # exited meanwhile
+        # The command name in parentheses may contain spaces
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+        rss[int(entry)] = pages * page_size
+    totals = {}
+    for root in roots:
+        total, stack = 0, [root]
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, ()))
+        totals[root] = total
+    return totals
+
+
+class Command(ScrapyCommand):
+    """Run the vendor spiders side by side, one ``scrapy crawl`` process each.
+
+    At most ``--jobs`` workers (and so Chromium instances) run at once, and
+    each worker gets an equal share of ``--memory``. The share is checked
+    against the RSS of the worker's whole process tree, browsers included,
+    and a worker over it is stopped as with Ctrl-C. Without ``/proc`` it
+    falls back to the worker's ``MEMUSAGE_LIMIT_MB``, which counts only the
+    Scrapy process. Vendors are separate sites, so every worker keeps its
+    own throttling and proxy state. Outputs, logs and per-spider stats
+    go to one run directory with a ``manifest.json`` describing the run.
+    """
+
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {"LOG_ENABLED": False}
+
+    def syntax(self):
+        return "[options] [spider ...]"
+
+    def short_desc(self):
+        return f"Run every spider in {SPIDER_PACKAGE} (or the given ones) in parallel processes"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="spiders (and browsers) running at once (default: CRAWLALL_MAX_WORKERS)")
+        parser.add_argument("-m", "--memory", type=int, default=None,
+                            help="memory budget in MB shared by all workers (default: CRAWLALL_MAX_MEMORY_MB)")
+        parser.add_argument("-d", "--output-dir", default=None,
+                            help="run directory (default: CRAWLALL_OUTPUT_DIR/<timestamp>)")
+        parser.add_argument("-f", "--format", default=None,
+                            help="feed format and extension of the outputs (default: CRAWLALL_FORMAT)")
+
+    def run(self, args, opts):
+        spiders = self.select_spiders(args)
+        jobs = max(1, opts.jobs or self.settings.getint("CRAWLALL_MAX_WORKERS"))
+        memory = opts.memory or self.settings.getint("CRAWLALL_MAX_MEMORY_MB")
+        run_dir = opts.output_dir or os.path.join(
+            self.settings.get("CRAWLALL_OUTPUT_DIR"), datetime.now().strftime("%Y%m%d-%H%M%S")
+        )
+        feed_format = opts.format or self.settings.get("CRAWLALL_FORMAT")
+        os.makedirs(run_dir, exist_ok=True)
+
+        self.worker_settings = {}
+        self.processes = {}
+        self.over_memory = set()
+        self.lock = threading.Lock()
+        self.stopping = False
+        self.finished = threading.Event()
+        if memory and os.path.isdir("/proc"):
+            threading.Thread(target=self.watch_memory, args=(memory // jobs,), daemon=True).start()
+        elif memory:
+            self.worker_settings = {"MEMUSAGE_ENABLED": True, "MEMUSAGE_LIMIT_MB": memory // jobs}
+        manifest = {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "jobs": jobs,
+            "memory_mb": memory,
+            "spiders": {},
+        }
+        print(f"Running {len(spiders)} spiders, {jobs} at a time, in {run_dir}")
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {name: pool.submit(self.crawl, name, run_dir, feed_format) for name in spiders}
+            try:
+                for name, future in futures.items():
+                    manifest["spiders"][name] = future.result()
+            except KeyboardInterrupt:
+                # Like Ctrl-C in a single crawl: workers shut down cleanly, outputs are kept
+                print("Stopping workers, wait for them to finish (Ctrl-C again to kill)")
+                self.stop_workers()
+                try:
+                    for name, future in futures.items():
+                        manifest["spiders"][name] = future.result()
+                except KeyboardInterrupt:
+                    self.stop_workers(kill=True)
+                    raise
+        self.finished.set()
+
+        manifest["finished"] = datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(run_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        failed = [
+            name for name, entry in manifest["spiders"].items() if entry["returncode"] != 0 or entry["memory_exceeded"]
+        ]
+        for name, entry in manifest["spiders"].items():
+            print(f"{name:12} {describe(entry):20} "
+                  f"{entry['items']:>7} items  {entry['elapsed']:>8.0f}s  {entry['output']}")
+        if failed:
+            print(f"Failed: {', '.join(failed)} (see their logs in {run_dir})")
+            self.exitcode = 1
+
+    def select_spiders(self, names):
+        if names:
+            known = get_spider_loader(self.settings).list()
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                raise UsageError(f"Unknown spiders: {', '.join(unknown)}")
+            return names
+        return vendor_spiders(self.settings)
+
+    def crawl(self, name, run_dir, feed_format):
+        output = os.path.join(run_dir, f"{name}.{feed_format}")
+        stats_file = os.path.join(run_dir, f"{name}.stats.json")
+        log_file = os.path.join(run_dir, f"{name}.log")
+        command = [sys.executable, "-m", "scrapy", "crawl", name, "-O", output, "--logfile", log_file,
+                   "-s", f"STATS_FILE={stats_file}"]
+        for key, value in self.worker_settings.items():
+            command += ["-s", f"{key}={value}"]
+
+        started = time.monotonic()
+        with self.lock:
+            if self.stopping:
+                return self.entry(output, log_file, stats_file, None, 0)
+            # Own process group, so a Ctrl-C in the terminal reaches only this process
+            process = subprocess.Popen(command, start_new_session=True)
+            self.processes[name] = process
+        print(f"[{name}] started (pid {process.pid})")
+        returncode = process.wait()
+        with self.lock:
+            del self.processes[name]
+        entry = self.entry(output, log_file, stats_file, returncode, time.monotonic() - started,
+                           memory_exceeded=name in self.over_memory)
+        print(f"[{name}] finished: {describe(entry)}, {entry['items']} items")
+        return entry
+
+    def entry(self, output, log_file, stats_file, returncode, elapsed, memory_exceeded=False):
+        try:
+            with open(stats_file, encoding="utf-8") as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        return {
+            "output": output,
+            "log": log_file,
+            "stats": stats_file if stats else None,
+            "returncode": returncode,
+            "finish_reason": stats.get("finish_reason"),
+            "memory_exceeded": memory_exceeded,
+            "items": stats.get("item_scraped_count", 0),
+            "elapsed": round(elapsed, 1),
+        }
+
+    def watch_memory(self, limit_mb):
+        """Stop workers whose process tree uses more than ``limit_mb``."""
+        while not self.finished.wait(MEMORY_CHECK_INTERVAL):
+            with self.lock:
+                processes = {name: process for name, process in self.processes.items() if name not in self.over_memory}
+            totals = process_tree_rss([process.pid for process in processes.values()])
+            for name, process in processes.items():
+                rss = totals[process.pid]
+                if rss > limit_mb * 1024 * 1024:
+                    print(f"[{name}] using {rss // (1024 * 1024)} MB with its browsers, over {limit_mb} MB: stopping")
+                    with self.lock:
+                        self.over_memory.add(name)
+                        process.send_signal(signal.SIGINT)
+
+    def stop_workers(self, kill=False):
+        with self.lock:
+            self.stopping = True
+            for process in self.processes.values():
+                process.send_signal(signal.SIGKILL if kill else signal.SIGINT)
@@ -0,0 +1,134 @@
+import json
+import math
+import mmap
+import os
+
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.utils.job import job_dir
+
+
+class BloomLayer:
+    """Fixed-size Bloom filter over a (file-backed or anonymous) mmap.
+
+    Fingerprints are already SHA-1 digests, so the bit positions come
+    straight from their bytes (double hashing) instead of hashing again.
+    """
+
+    def __init__(self, capacity, error_rate, path=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        size = (self.bits + 7) // 8
+        if path is None:
+            self.file = None
+            self.map = mmap.mmap(-1, size)
+        else:
+            new = not os.path.exists(path)
+            self.file = open(path, "w+b" if new else "r+b")
+            if new:
+                self.file.truncate(size)  # sparse until bits are set
+            self.map = mmap.mmap(self.file.fileno(), size)
+        self.count = 0 if path is None or new else self.estimate_count()
+
+    def positions(self, fingerprint):
+        first = int.from_bytes(fingerprint[:8], "little")
+        step = int.from_bytes(fingerprint[8:16], "little") | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, fingerprint):
+        data = self.map
+        return all(data[bit >> 3] & (1 << (bit & 7)) for bit in self.positions(fingerprint))
+
+    def add(self, fingerprint):
+        data = self.map
+        for bit in self.positions(fingerprint):
+            data[bit >> 3] |= 1 << (bit & 7)
+        self.count += 1
+
+    def estimate_count(self):
+        # From the share of set bits, so an unclean shutdown can't lose the count
+        set_bits = int.from_bytes(self.map[:], "little").bit_count()
+        if set_bits >= self.bits:
+            return self.capacity
+        return round(-self.bits / self.hashes * math.log(1 - set_bits / self.bits))
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class BloomDupeFilter(RFPDupeFilter):
+    """Dupefilter keeping request fingerprints in a scalable Bloom filter.
+
+    Memory is a few bytes per request instead of a Python set entry, and
+    with ``JOBDIR`` the filter lives in mmapped files there, so resuming a
+    crawl maps them back instead of reading every fingerprint. When a layer
+    is full a larger one with a tighter error rate is added, keeping the
+    overall false-positive rate (a new request wrongly dropped) below
+    ``BLOOM_DUPEFILTER_ERROR_RATE``.
+    """
+
+    growth = 2  # capacity of each new layer relative to the last
+    tightening = 0.5  # error rate of each new layer relative to the last
+
+    def __init__(self, path=None, debug=False, *, fingerprinter=None, capacity=1000000, error_rate=1e-6):
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        self.directory = os.path.join(path, "requests.bloom") if path else None
+        self.capacity = capacity
+        # The layers' error rates add up to at most error_rate / (1 - tightening)
+        self.error_rate = error_rate * (1 - self.tightening)
+        self.layers = []
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            for capacity, error_rate in self.read_layout():
+                self.open_layer(capacity, error_rate)
+        if not self.layers:
+            self.add_layer(self.capacity, self.error_rate)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            job_dir(settings),
+            settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=crawler.request_fingerprinter,
+            capacity=settings.getint("BLOOM_DUPEFILTER_CAPACITY", 1000000),
+            error_rate=settings.getfloat("BLOOM_DUPEFILTER_ERROR_RATE", 1e-6),
+        )
+
+    def read_layout(self):
+        try:
+            with open(os.path.join(self.directory, "layers.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def open_layer(self, capacity, error_rate):
+        path = None
+        if self.directory:
+            path = os.path.join(self.directory, f"layer-{len(self.layers)}.bits")
+        self.layers.append(BloomLayer(capacity, error_rate, path))
+
+    def add_layer(self, capacity, error_rate):
+        self.open_layer(capacity, error_rate)
+        if self.directory:
+            with open(os.path.join(self.directory, "layers.json"), "w", encoding="utf-8") as f:
+                json.dump([[layer.capacity, layer.error_rate] for layer in self.layers], f)
+
+    def request_seen(self, request):
+        fp = self._fingerprint(request)
+        if any(fp in layer for layer in self.layers):
+            return True
+        layer = self.layers[-1]
+        if layer.count >= layer.capacity:
+            self.add_layer(layer.capacity * self.growth, layer.error_rate * self.tightening)
+            layer = self.layers[-1]
+        layer.add(fp)
+        return False
+
+    def close(self, reason):
+        for layer in self.layers:
+            layer.close()
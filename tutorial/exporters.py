@@ -0,0 +1,141 @@
+from dataclasses import fields
+
+from scrapy.exporters import BaseItemExporter, CsvItemExporter
+
+from tutorial.items import ProteinOffer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Column types of ProteinOffer fields that aren't plain strings
+LIST_TYPES = {
+    "quantities": "float64",
+    "units": "string",
+    "price_values": "float64",
+    "gene_symbols": "string",
+}
+
+
+def offer_schema():
+    """Arrow schema of a ``ProteinOffer``, so every vendor's file has the same column types."""
+    return pa.schema([
+        (f.name, pa.list_(pa.type_for_alias(LIST_TYPES[f.name])) if f.name in LIST_TYPES else pa.string())
+        for f in fields(ProteinOffer)
+    ])
+
+
+class OfferCsvItemExporter(CsvItemExporter):
+    """CSV feed with every list column "/"-joined, like ``sizes`` and ``prices``.
+
+    Scrapy's exporter joins lists of strings with commas but writes lists
+    of numbers as Python reprs, so ``units`` and ``quantities`` came out
+    in different formats. A field's own ``serializer`` still wins.
+    """
+
+    def __init__(self, file, join_multivalued="/", **kwargs):
+        super().__init__(file, join_multivalued=join_multivalued, **kwargs)
+        self.separator = join_multivalued
+
+    def serialize_field(self, field, name, value):
+        if "serializer" not in field and isinstance(value, (list, tuple)):
+            return self.separator.join(str(part) for part in value)
+        return super().serialize_field(field, name, value)
+
+
+class ColumnarItemExporter(BaseItemExporter):
+    """Write items as Arrow record batches of ``batch_size`` rows.
+
+    Rows are buffered column by column and written out once the buffer is
+    full, so memory use stays bounded however long the crawl runs.
+    ``ProteinOffer`` items get ``offer_schema()``; other items get the
+    schema of the first batch. Subclasses open the file writer.
+    """
+
+    def __init__(self, file, batch_size=1000, **kwargs):
+        if pa is None:
+            raise ImportError(f"{type(self).__name__} requires pyarrow: pip install pyarrow")
+        super().__init__(dont_fail=True, **kwargs)
+        self.file = file
+        self.batch_size = batch_size
+        self.schema = None
+        self.writer = None
+        self.columns = {}  # field name -> values of the buffered rows
+        self.row_count = 0
+
+    def open_writer(self, schema):
+        raise NotImplementedError
+
+    def export_item(self, item):
+        if self.schema is None and isinstance(item, ProteinOffer) and not self.fields_to_export:
+            self.schema = offer_schema()
+        for name, value in self.get_serialized_fields(item):
+            column = self.columns.get(name)
+            if column is None:
+                # A field first seen now is null for the rows before
+                column = self.columns[name] = [None] * self.row_count
+            column.append(value)
+        self.row_count += 1
+        for column in self.columns.values():
+            if len(column) < self.row_count:
+                column.append(None)
+        if self.row_count >= self.batch_size:
+            self.flush()
+        return item
+
+    def flush(self):
+        if not self.row_count:
+            return
+        if self.schema is None:
+            table = pa.Table.from_pydict(self.columns)
+            self.schema = table.schema
+        else:
+            # Fields missing from the buffer become nulls, unknown ones are dropped
+            nulls = [None] * self.row_count
+            table = pa.Table.from_pydict(
+                {name: self.columns.get(name, nulls) for name in self.schema.names}, schema=self.schema
+            )
+        if self.writer is None:
+            self.writer = self.open_writer(self.schema)
+        self.writer.write_table(table)
+        self.columns = {}
+        self.row_count = 0
+
+    def empty_schema(self):
+        """Columns of a crawl without items: ``offer_schema()``, narrowed to ``fields_to_export``."""
+        schema = offer_schema()
+        if not self.fields_to_export:
+            return schema
+        names = self.fields_to_export
+        names = names.items() if isinstance(names, dict) else [(name, name) for name in names]
+        return pa.schema([
+            (output, schema.field(name).type if name in schema.names else pa.string()) for name, output in names
+        ])
+
+    def finish_exporting(self):
+        self.flush()
+        if self.writer is None:
+            # No items at all: still leave a readable file with the columns
+            self.writer = self.open_writer(self.schema or self.empty_schema())
+        # Writers given a file object leave closing it to the feed storage
+        self.writer.close()
+
+
+class ParquetItemExporter(ColumnarItemExporter):
+    """``-O name.parquet``; read back with ``pd.read_parquet``."""
+
+    def __init__(self, file, compression="zstd", **kwargs):
+        self.compression = compression
+        super().__init__(file, **kwargs)
+
+    def open_writer(self, schema):
+        return pq.ParquetWriter(self.file, schema, compression=self.compression)
+
+
+class ArrowItemExporter(ColumnarItemExporter):
+    """``-O name.arrow``, an Arrow IPC file that can be memory-mapped as is."""
+
+    def open_writer(self, schema):
+        return pa.ipc.new_file(self.file, schema)
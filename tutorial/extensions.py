@@ -0,0 +1,97 @@
+import json
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from tutorial.timing import PhaseTimings, now, request_times
+
+
+class StatsFileExtension:
+    """Write the crawl stats as JSON to ``STATS_FILE`` when the spider closes.
+
+    ``scrapy crawlall`` sets it for every worker and gathers the files into
+    its run manifest.
+    """
+
+    def __init__(self, path, stats):
+        self.path = path
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("STATS_FILE")
+        if not path:
+            raise NotConfigured
+        extension = cls(path, crawler.stats)
+        # Late enough that the core stats (finish_reason, elapsed time) are in
+        crawler.signals.connect(extension.engine_stopped, signal=signals.engine_stopped)
+        return extension
+
+    def engine_stopped(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.stats.get_stats(), f, indent=2, default=str)
+
+
+class PhaseTimingExtension:
+    """Time every request phase, per domain, when ``PHASE_TIMING_ENABLED`` is set.
+
+    Uses the engine's signals for the boundaries it can see;
+    ``PhaseTimingMiddleware`` and ``PhaseTimingSpiderMiddleware`` mark the
+    rest. At close, p50/p95/p99 of every phase go to the stats as
+    ``timing/<domain>/<phase>/<quantile>`` and the whole report to
+    ``PHASE_TIMING_FILE``.
+    """
+
+    def __init__(self, timings, stats, path):
+        self.timings = timings
+        self.stats = stats
+        self.path = path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PHASE_TIMING_ENABLED"):
+            raise NotConfigured
+        extension = cls(PhaseTimings.from_crawler(crawler), crawler.stats, crawler.settings.get("PHASE_TIMING_FILE"))
+        for handler, signal in (
+            (extension.request_scheduled, signals.request_scheduled),
+            (extension.request_reached_downloader, signals.request_reached_downloader),
+            (extension.request_left_downloader, signals.request_left_downloader),
+            (extension.item_done, signals.item_scraped),
+            (extension.item_done, signals.item_dropped),
+            (extension.item_done, signals.item_error),
+            (extension.spider_closed, signals.spider_closed),
+        ):
+            crawler.signals.connect(handler, signal=signal)
+        return extension
+
+    def request_scheduled(self, request, spider):
+        # Retries and redirects copy the meta; each attempt is timed on its own
+        request.meta["phase_times"] = {"scheduled": now()}
+
+    def request_reached_downloader(self, request, spider):
+        request_times(request)["reached"] = now()
+
+    def request_left_downloader(self, request, spider):
+        times = request_times(request)
+        times["left"] = now()
+        url = request.url
+        self.timings.add_span(url, "queue", times, "scheduled", "dequeued")
+        # "reached" is when the request joins its download slot's queue, before waiting there
+        self.timings.add_span(url, "middlewares", times, "dequeued", "reached")
+        if "navigation_start" in times:
+            self.timings.add_span(url, "slot_and_browser", times, "reached", "navigation_start")
+            self.timings.add_span(url, "navigation", times, "navigation_start", "navigation_end")
+            self.timings.add_span(url, "page_methods", times, "navigation_end", "left")
+        else:
+            self.timings.add_span(url, "slot_and_download", times, "reached", "left")
+
+    def item_done(self, item, spider, **kwargs):
+        # Scraped, dropped or failed: its pipeline run is over either way
+        self.timings.item_done(item)
+
+    def spider_closed(self, spider):
+        self.timings.to_stats(self.stats)
+        if self.path:
+            path = self.path % {"name": spider.name}
+            self.timings.dump(path, spider.name)
+            spider.logger.info(f"[Timing] Phase timings written to {path}")
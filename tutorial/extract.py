@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# One anchor of a listing page; ``data`` holds its data-* attributes without the prefix
+ListingLink = namedtuple("ListingLink", ["href", "text", "data"])
+
+# Reads innerText of the first match of every selector in one round trip
+EXTRACT_SCRIPT = """
+(fields) => {
+    const values = {};
+    for (const [field, selector] of Object.entries(fields)) {
+        const el = document.querySelector(selector);
+        values[field] = el ? el.innerText.trim() : null;
+    }
+    return values;
+}
+"""
+
+
+async def extract_fields(page, fields, ready=None, timeout=20000, default="N/A"):
+    """Return ``{field: text}`` for a ``{field: selector}`` dict in one ``page.evaluate``.
+
+    Waits once, up to ``timeout`` ms, for the ``ready`` selector; whatever
+    has rendered by then is read, and fields with no match (or empty text)
+    get ``default``. A missing field costs nothing extra.
+    """
+    if ready:
+        try:
+            await page.wait_for_selector(ready, timeout=timeout)
+        except PlaywrightTimeoutError:
+            pass
+    values = await page.evaluate(EXTRACT_SCRIPT, fields)
+    return {field: values.get(field) or default for field in fields}
+
+
+def listing_links(anchors, text="::text"):
+    """Return a ``ListingLink`` for each anchor in the ``anchors`` selector list.
+
+    Each anchor is visited once and its text read with the ``text``
+    selector relative to it, so a listing parses in linear time. Anchors
+    without an href are skipped; hrefs are returned as written.
+    """
+    links = []
+    for anchor in anchors:
+        href = anchor.attrib.get("href")
+        if not href:
+            continue
+        label = " ".join(part.strip() for part in anchor.css(text).getall() if part.strip())
+        data = {key[5:]: value for key, value in anchor.attrib.items() if key.startswith("data-")}
+        links.append(ListingLink(href, label, data))
+    return links
@@ -0,0 +1,271 @@
+import os
+import pickle
+import socket
+import sqlite3
+import time
+import uuid
+from collections import deque
+
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.misc import load_object
+from scrapy.utils.request import request_from_dict
+from twisted.internet import task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL UNIQUE,
+    priority INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS requests_ready ON requests (state, priority DESC, id);
+"""
+
+
+class Frontier:
+    """Requests of one crawl in a SQLite file shared by several worker processes.
+
+    The unique fingerprint column is the dupefilter for all workers. A
+    worker leases the next request for ``lease_secs`` and marks it done
+    once its callback has run; a lease that runs out (the worker crashed
+    or was killed) makes the request available to the others again.
+    """
+
+    def __init__(self, path, owner, lease_secs=300):
+        # Workers wait for each other's writes instead of failing
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.owner = owner
+        self.lease_secs = lease_secs
+
+    def push(self, fingerprint, priority, data):
+        """Add a request; False if the fingerprint was already in the frontier."""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO requests (fingerprint, priority, data) VALUES (?, ?, ?)",
+            (fingerprint, priority, data),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self):
+        """Take the best pending (or abandoned) request.
+
+        Returns ``(id, data, attempts)``, attempts being how often it was
+        leased before, or None when nothing is available.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT id, data, attempts FROM requests"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY priority DESC, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE requests SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1"
+                    " WHERE id = ?",
+                    (self.owner, now + self.lease_secs, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def renew(self, ids):
+        self.conn.executemany(
+            "UPDATE requests SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            [(time.time() + self.lease_secs, request_id, self.owner) for request_id in ids],
+        )
+
+    def done(self, request_id):
+        self.conn.execute(
+            "UPDATE requests SET state = 'done', owner = NULL, lease_expires = NULL WHERE id = ?", (request_id,)
+        )
+
+    def release(self):
+        """Hand this worker's leases back, for a clean shutdown."""
+        self.conn.execute(
+            "UPDATE requests SET state = 'pending', owner = NULL, lease_expires = NULL"
+            " WHERE owner = ? AND state = 'leased'",
+            (self.owner,),
+        )
+
+    def has_pending(self):
+        # Leases held by other workers count: they may still add requests
+        return self.conn.execute("SELECT 1 FROM requests WHERE state != 'done' LIMIT 1").fetchone() is not None
+
+    def close(self):
+        self.conn.close()
+
+
+class FrontierScheduler:
+    """Scheduler taking its requests from a ``Frontier`` shared with other workers.
+
+    Start several ``scrapy crawl`` processes of the same spider with
+    ``SCHEDULER = "tutorial.frontier.FrontierScheduler"``: each one leases
+    requests from ``FRONTIER_PATH`` and adds the ones it finds, so the
+    catalog is split between them without duplicates. Requests that
+    can't be pickled stay in a local queue of the worker that made them.
+    """
+
+    def __init__(self, crawler, path, lease_secs):
+        self.stats = crawler.stats
+        self.fingerprinter = crawler.request_fingerprinter
+        self.path = path
+        self.lease_secs = lease_secs
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+        self.frontier = None
+        self.spider = None
+        self.local = deque()
+        self.in_flight = set()
+        self.renew_task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # FrontierAckMiddleware reports finished requests through it
+        scheduler = crawler.frontier_scheduler = cls(
+            crawler,
+            crawler.settings.get("FRONTIER_PATH", "frontier-%(name)s.sqlite3"),
+            crawler.settings.getfloat("FRONTIER_LEASE_SECS", 300),
+        )
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self.frontier = Frontier(self.path % {"name": spider.name}, self.owner, self.lease_secs)
+        # Downloads can outlast a lease (slow pages, retries), so keep ours alive
+        self.renew_task = task.LoopingCall(self.renew)
+        self.renew_task.start(self.lease_secs / 3, now=False)
+
+    def close(self, reason):
+        if self.renew_task is not None and self.renew_task.running:
+            self.renew_task.stop()
+        self.frontier.release()
+        self.frontier.close()
+
+    def renew(self):
+        if self.in_flight:
+            self.frontier.renew(self.in_flight)
+
+    def has_pending_requests(self):
+        return bool(self.local) or self.frontier.has_pending()
+
+    def enqueue_request(self, request):
+        # A retry or redirect of a leased request takes over from it once stored
+        parent_id = request.meta.pop("frontier_id", None)
+        fingerprint = self.frontier_key(request, retry=parent_id is not None)
+        try:
+            data = pickle.dumps(request.to_dict(spider=self.spider), protocol=pickle.HIGHEST_PROTOCOL)
+        except (TypeError, ValueError, AttributeError, pickle.PicklingError):
+            self.local.append(request)
+            self.stats.inc_value("frontier/enqueued/local")
+            self.done(parent_id)
+            return True
+        stored = self.frontier.push(fingerprint, request.priority, data)
+        self.done(parent_id)
+        if not stored:
+            self.spider.logger.debug(f"Filtered duplicate request: {request}")
+            self.stats.inc_value("dupefilter/filtered")
+            return False
+        self.stats.inc_value("frontier/enqueued")
+        return True
+
+    def frontier_key(self, request, retry):
+        """Fingerprint a request is stored under in the frontier.
+
+        Every worker issues the same start and listing requests, so
+        ``dont_filter`` only gets around the frontier's dupefilter for
+        retries and redirects of a leased request, which must not collide
+        with it. Listing pages are keyed by their paginator and page too.
+        """
+        fingerprint = self.fingerprinter.fingerprint(request).hex()
+        if request.dont_filter and retry:
+            return f"{fingerprint}:{uuid.uuid4().hex}"
+        if "pagination_key" in request.meta:
+            return f"{fingerprint}:{request.meta['pagination_key']}:{request.meta.get('page_num')}"
+        return fingerprint
+
+    def next_request(self):
+        if self.local:
+            return self.local.popleft()
+        row = self.frontier.lease()
+        if row is None:
+            return None
+        request_id, data, attempts = row
+        if attempts:
+            # A worker took it before and never finished it
+            self.stats.inc_value("frontier/reclaimed")
+        request = request_from_dict(pickle.loads(data), spider=self.spider)
+        request.meta["frontier_id"] = request_id
+        self.in_flight.add(request_id)
+        self.stats.inc_value("frontier/leased")
+        return request
+
+    def finish(self, request):
+        """Mark a leased request done, so no other worker picks it up again."""
+        self.done(request.meta.get("frontier_id"))
+
+    def done(self, request_id):
+        if request_id in self.in_flight:
+            self.in_flight.discard(request_id)
+            self.frontier.done(request_id)
+
+    def __len__(self):
+        return len(self.local) + len(self.in_flight)
+
+
+class FrontierAckMiddleware:
+    """Spider middleware telling the ``FrontierScheduler`` a request is finished.
+
+    A request is done once its callback's output has been consumed (items
+    and follow-up requests handed to the engine, so the requests are in
+    the frontier) or once the callback has failed. A worker dying in the
+    middle of a callback leaves the lease to run out, and another worker
+    takes the page again. Sits next to the engine, so the output has been
+    through every other spider middleware first.
+
+    Downloads that fail are done through ``FrontierErrorMiddleware``;
+    retries and redirects are handed over when the new request is
+    scheduled instead.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if load_object(crawler.settings["SCHEDULER"]) is not FrontierScheduler:
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_spider_output(self, response, result, spider):
+        yield from result
+        self.crawler.frontier_scheduler.finish(response.request)
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for entry in result:
+            yield entry
+        self.crawler.frontier_scheduler.finish(response.request)
+
+    def process_spider_exception(self, response, exception, spider):
+        self.crawler.frontier_scheduler.finish(response.request)
+
+
+class FrontierErrorMiddleware(FrontierAckMiddleware):
+    """Downloader middleware marking requests done whose download failed.
+
+    Runs before the errback, so what the errback yields is not covered.
+    Includes requests that a later middleware ignored, and errors raised
+    by the download handler; errors raised in ``process_response`` never
+    reach it, and their requests run out their lease instead.
+    """
+
+    def process_exception(self, request, exception, spider):
+        self.crawler.frontier_scheduler.finish(request)
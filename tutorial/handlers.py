@@ -0,0 +1,49 @@
+import inspect
+
+from scrapy_playwright.handler import ScrapyPlaywrightDownloadHandler
+
+from tutorial.resources import STEALTH_SCRIPT, ResourcePolicy
+
+
+class PlaywrightDownloadHandler(ScrapyPlaywrightDownloadHandler):
+    """scrapy-playwright handler with the project's blocking and stealth.
+
+    Subrequests are checked against the ``ResourcePolicy`` built from the
+    ``RESOURCE_BLOCK_*`` settings; a ``PLAYWRIGHT_ABORT_REQUEST`` set by a
+    spider still runs for whatever the policy lets through. Init scripts
+    (``PLAYWRIGHT_STEALTH``, ``PLAYWRIGHT_INIT_SCRIPTS``) are added to each
+    browser context when it is created instead of to every page.
+    """
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        settings = crawler.settings
+        self.resource_policy = ResourcePolicy.from_settings(settings)
+        self.init_scripts = list(settings.getlist("PLAYWRIGHT_INIT_SCRIPTS"))
+        if settings.getbool("PLAYWRIGHT_STEALTH"):
+            self.init_scripts.insert(0, STEALTH_SCRIPT)
+
+        self.spider_abort_request = self.abort_request
+        if self.resource_policy or self.spider_abort_request:
+            self.abort_request = self.should_abort
+
+    async def should_abort(self, request):
+        rule = self.resource_policy.match(request)
+        if rule:
+            self.stats.inc_value("resources/blocked")
+            self.stats.inc_value(f"resources/blocked/{rule}")
+            self.stats.inc_value(
+                "resources/blocked/bytes_estimated",
+                self.resource_policy.bytes_estimate.get(request.resource_type, 0),
+            )
+            return True
+        if self.spider_abort_request:
+            result = self.spider_abort_request(request)
+            return await result if inspect.isawaitable(result) else result
+        return False
+
+    async def _create_browser_context(self, name, context_kwargs, spider=None):
+        ctx_wrapper = await super()._create_browser_context(name, context_kwargs, spider=spider)
+        for script in self.init_scripts:
+            await ctx_wrapper.context.add_init_script(script)
+        return ctx_wrapper
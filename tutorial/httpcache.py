@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import time
+from pathlib import Path
+
+from scrapy.extensions.httpcache import DummyPolicy, FilesystemCacheStorage
+from scrapy_playwright.page import PageMethod
+
+logger = logging.getLogger(__name__)
+
+VALIDATORS = (b"ETag", b"Last-Modified")
+
+
+def page_methods_signature(request):
+    """Hash of what the browser was told to do for ``request``.
+
+    Covers ``playwright_page_methods`` and ``playwright_page_goto_kwargs``;
+    changing either makes the cached DOM stale.
+    """
+    parts = []
+    for method in request.meta.get("playwright_page_methods") or ():
+        if isinstance(method, PageMethod):
+            name = method.method if isinstance(method.method, str) else method.method.__qualname__
+            parts.append((name, method.args, sorted(method.kwargs.items())))
+        else:
+            parts.append(method)
+    parts.append(sorted((request.meta.get("playwright_page_goto_kwargs") or {}).items()))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class RenderedCacheStorage(FilesystemCacheStorage):
+    """Filesystem cache (keyed by request fingerprint) for rendered pages.
+
+    The stored body is the DOM Playwright returned, gzipped with
+    ``HTTPCACHE_GZIP``. Each entry also records the page-method signature;
+    an entry stored under other page methods is treated as missing.
+    """
+
+    def store_response(self, spider, request, response):
+        super().store_response(spider, request, response)
+        rpath = Path(self._get_request_path(spider, request))
+        (rpath / "page_methods").write_text(page_methods_signature(request))
+
+    def retrieve_response(self, spider, request):
+        metadata = self._read_meta(spider, request)
+        if metadata is None:
+            return None
+        sigpath = Path(self._get_request_path(spider, request)) / "page_methods"
+        stored = sigpath.read_text() if sigpath.exists() else None
+        if stored != page_methods_signature(request):
+            logger.debug(f"[Cache] Page methods changed for {request.url}, rendering again")
+            return None
+        response = super().retrieve_response(spider, request)
+        request.meta["cache_timestamp"] = metadata["timestamp"]
+        return response
+
+
+class RenderedCachePolicy(DummyPolicy):
+    """Serve entries for ``RENDERED_CACHE_TTL`` seconds, then revalidate.
+
+    A stale entry with ETag or Last-Modified is checked with a conditional
+    GET over plain HTTP, outside the browser; a 304 or unchanged validators
+    keep the cached DOM. Without validators the page is rendered again.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.ttl = settings.getint("RENDERED_CACHE_TTL", 0)
+
+    def should_cache_response(self, response, request):
+        return response.status == 200 and super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        timestamp = request.meta.get("cache_timestamp")
+        if not self.ttl or timestamp is None or time.time() - timestamp < self.ttl:
+            return True
+        if not any(header in cachedresponse.headers for header in VALIDATORS):
+            return False
+        if b"ETag" in cachedresponse.headers:
+            request.headers[b"If-None-Match"] = cachedresponse.headers[b"ETag"]
+        if b"Last-Modified" in cachedresponse.headers:
+            request.headers[b"If-Modified-Since"] = cachedresponse.headers[b"Last-Modified"]
+        if request.meta.get("playwright") or request.meta.get("cache_revalidating"):
+            request.meta["playwright"] = False
+            request.meta["cache_revalidating"] = True
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        if response.status == 304 or response.status >= 500:
+            return True
+        if response.status != 200:
+            return False
+        return any(
+            header in cachedresponse.headers and response.headers.get(header) == cachedresponse.headers[header]
+            for header in VALIDATORS
+        )
@@ -3,10 +3,38 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
-import tutorial
+from dataclasses import dataclass, field
 
 
-class TutorialItem(tutorial.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+@dataclass(slots=True)
+class ProteinOffer:
+    """One product page of a vendor, with the same columns for every vendor.
+
+    ``sizes`` and ``prices`` are the "/"-joined strings as shown on the
+    site; ``OfferNormalizationPipeline`` parses them into ``quantities``,
+    ``units`` and ``price_values``, and ``AliasPipeline`` fills in the
+    ``gene_symbols`` named by it. Details a vendor doesn't show stay "N/A".
+    """
+
+    vendor: str
+    catalog_no: str = "N/A"
+    name: str = "N/A"
+    sizes: str = ""
+    prices: str = ""
+    purity: str = "N/A"
+    endotoxin_level: str = "N/A"
+    expression_system: str = "N/A"
+    applications: str = "N/A"
+    species: str = "N/A"
+    reactivity: str = "N/A"
+    gene: str = "N/A"
+    format: str = "N/A"
+    activity: str = "N/A"
+    source: str = "N/A"
+    protein_name: str = "N/A"
+    expressed_region: str = "N/A"
+    url: str = "N/A"
+    quantities: list = field(default_factory=list)
+    units: list = field(default_factory=list)
+    price_values: list = field(default_factory=list)
+    gene_symbols: list = field(default_factory=list)
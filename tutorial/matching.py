@@ -0,0 +1,71 @@
+from collections import deque
+
+import pandas as pd
+
+
+def normalize_names(values):
+    """Lowercase and drop spaces and hyphens, for a whole column at once."""
+    return pd.Series(values, dtype="object").fillna("").astype(str).str.lower().str.replace(r"[\s\-]", "", regex=True)
+
+
+class SymbolMatcher:
+    """Aho–Corasick automaton over a list of normalised symbols.
+
+    The symbols are compiled once into a trie with failure links, after
+    which ``find`` reports every symbol contained in a name in a single
+    pass over the name, however many symbols there are.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for symbol in dict.fromkeys(symbols):  # keeps order, drops duplicates
+            if symbol:
+                self.add(symbol)
+        self.link()
+
+    def add(self, symbol):
+        node = 0
+        for char in symbol:
+            if char not in self.goto[node]:
+                self.goto[node][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            node = self.goto[node][char]
+        self.output[node] += (len(self.symbols),)
+        self.symbols.append(symbol)
+
+    def link(self):
+        # Breadth first, so a node's failure target is finished before its children
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                # Symbols ending at the failure target also end here
+                self.output[child] += self.output[self.fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """Return the symbols found in ``text`` (already normalised), in symbol-list order."""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return [self.symbols[index] for index in sorted(found)]
+
+    def find_all(self, names):
+        """``find`` for every entry of a column of raw names; returns a Series of lists."""
+        normalized = normalize_names(names)
+        return pd.Series([self.find(name) for name in normalized], index=normalized.index)
@@ -1,34 +1,80 @@
-import requests
-import re
-import os
+import asyncio
+import time
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Request, TextResponse
+from twisted.internet.threads import deferToThread
+
+from tutorial.browser import ContextPool, PageGuard, add_page_init_callback, record_server_latency
+from tutorial.budget import ProductBudget, request_kind
+from tutorial.productindex import ProductIndex
+from tutorial.proxypool import ProxyPool, check_proxy
+from tutorial.templates import get_template
+from tutorial.throttle import RateControllers
+from tutorial.timing import PhaseTimings, now, record_navigation, request_times
+
 
 class PlaywrightProxyMiddleware:
-    def __init__(self):
-        self.proxies = self.load_proxies_from_file()
-        self.proxy_index = 0
-        self.request_counter = 0
-        self.rotate_every = 30
+    # Statuses that point at a dead, banned or overloaded proxy
+    failure_codes = {403, 407, 429, 502, 503, 504}
+
+    def __init__(self, pool, ip_check_url="http://checkip.dyndns.org", ip_check_ttl=600,
+                 ip_check_timeout=5, validate_on_start=True):
+        self.pool = pool
+        self.validate_on_start = validate_on_start
+
+        # proxy -> (external ip, time of check); filled in the background
+        self.ip_check_url = ip_check_url
+        self.ip_check_ttl = ip_check_ttl
+        self.ip_check_timeout = ip_check_timeout
+        self.ip_cache = {}
+        self.ip_checks_pending = set()
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls()
+        settings = crawler.settings
+        middleware = cls(
+            ProxyPool.from_settings(settings, stats=crawler.stats),
+            ip_check_url=settings.get("PROXY_IP_CHECK_URL", "http://checkip.dyndns.org"),
+            ip_check_ttl=settings.getint("PROXY_IP_CHECK_TTL", 600),
+            ip_check_timeout=settings.getint("PROXY_IP_CHECK_TIMEOUT", 5),
+            validate_on_start=settings.getbool("PROXY_POOL_VALIDATE_ON_START", True),
+        )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        return middleware
 
-    def process_request(self, request, spider):
-        if "playwright" in request.meta:
-            self.request_counter += 1
+    def spider_opened(self, spider):
+        if not self.validate_on_start:
+            return None
+        spider.logger.info(f"[Proxy] Validating {len(self.pool.proxies)} proxies")
+
+        def log_result(_):
+            spider.logger.info(f"[Proxy] {spider.crawler.stats.get_value('proxypool/healthy')} proxies healthy after validation")
 
-            # Rotate proxy every N requests
-            if self.request_counter >= self.rotate_every or not self.proxies:
-                self.rotate_proxy()
-                self.request_counter = 0
+        # Returning the Deferred holds the crawl start until validation is done
+        d = self.pool.validate(self.ip_check_url, self.ip_check_timeout)
+        d.addCallback(log_result)
+        return d
 
-            current_proxy = self.proxies[self.proxy_index]
-            request.meta["playwright_browser_context_args"] = {
-                "proxy": {"server": current_proxy}
-            }
+    def process_request(self, request, spider):
+        # StaticFirstMiddleware's plain HTTP attempts go out through the pool too
+        static_attempt = request.meta.get("static_first_pending")
+        if request.meta.get("playwright") or static_attempt:
+            current_proxy = self.pool.get_proxy(urlparse(request.url).hostname)
+            request.meta["proxy_server"] = current_proxy
+            request.meta["proxy_start_time"] = time.monotonic()
+            if static_attempt:
+                request.meta["proxy"] = current_proxy
+            else:
+                request.meta["playwright_context_kwargs"] = {
+                    "proxy": {"server": current_proxy}
+                }
 
-            # Get current IP via external check
-            ip = self.get_current_ip()
+            # Cached external IP of the proxy, refreshed in the background
+            ip = self.get_cached_ip(current_proxy, spider)
 
             # Get User-Agent from request headers or fallback
             user_agent = request.headers.get("User-Agent")
@@ -40,28 +86,536 @@ class PlaywrightProxyMiddleware:
             if ip and spider:
                 spider.logger.info(f"[Proxy] Using proxy: {current_proxy} | External IP: {ip} | User-Agent: {user_agent}")
 
-    def load_proxies_from_file(self):
-        # Look for proxy-list.txt in the project root
-        proxy_file = os.path.join(os.path.dirname(__file__), '..', 'proxy-list.txt')
-        if not os.path.exists(proxy_file):
-            raise FileNotFoundError("proxy-list.txt not found in root directory.")
+    def process_response(self, request, response, spider):
+        proxy = request.meta.get("proxy_server")
+        if proxy and "cached" not in response.flags:
+            domain = urlparse(request.url).hostname
+            latency = request.meta.get("download_latency") or self.elapsed(request)
+            if response.status in self.failure_codes:
+                self.pool.record_failure(proxy, domain, latency)
+            else:
+                self.pool.record_success(proxy, domain, latency)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # Playwright navigation timeouts and connection errors end up here
+        proxy = request.meta.get("proxy_server")
+        if proxy:
+            self.pool.record_failure(proxy, urlparse(request.url).hostname, self.elapsed(request))
+            spider.logger.debug(f"[Proxy] {proxy} failed for {request.url}: {exception!r}")
+
+    def elapsed(self, request):
+        start = request.meta.get("proxy_start_time")
+        return time.monotonic() - start if start else None
+
+    def get_cached_ip(self, proxy, spider=None):
+        """Return the last known external IP of ``proxy`` without blocking.
+
+        A stale or missing entry schedules a check in a worker thread; the
+        result is picked up by later requests using the same proxy.
+        """
+        cached = self.ip_cache.get(proxy)
+        if cached is None or time.monotonic() - cached[1] > self.ip_check_ttl:
+            self.schedule_ip_check(proxy, spider)
+        return cached[0] if cached else None
+
+    def schedule_ip_check(self, proxy, spider=None):
+        if proxy in self.ip_checks_pending:
+            return
+        self.ip_checks_pending.add(proxy)
+
+        def on_result(result):
+            ip, _ = result
+            self.ip_checks_pending.discard(proxy)
+            self.ip_cache[proxy] = (ip, time.monotonic())
+            if spider:
+                if ip:
+                    spider.logger.info(f"[Proxy] Verified proxy: {proxy} | External IP: {ip}")
+                else:
+                    spider.logger.warning(f"[Proxy] Could not verify proxy: {proxy}")
+
+        d = deferToThread(check_proxy, proxy, self.ip_check_url, self.ip_check_timeout)
+        d.addCallback(on_result)
+        return d
+
+
+class PlaywrightContextMiddleware:
+    """Route Playwright requests to a pooled browser context per (proxy, vendor).
+
+    Runs after PlaywrightProxyMiddleware, which picks ``proxy_server``.
+    With ``PLAYWRIGHT_TAB_POOL_SIZE`` set, the request is given a parked
+    tab of its context when there is one.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(ContextPool.from_crawler(crawler))
+
+    async def process_request(self, request, spider):
+        if not request.meta.get("playwright"):
+            return None
+        slot = await self.pool.acquire(request.meta.get("proxy_server"), spider.name)
+        request.meta["playwright_context"] = slot.name
+        request.meta["playwright_context_kwargs"] = slot.kwargs
+        request.meta["context_pending"] = True
+        add_page_init_callback(request, self.pool.on_page)
+        if self.pool.tab_pool_size:
+            # Keep the page past the download so it can go back to the pool
+            request.meta["playwright_include_page"] = True
+            page = request.meta.get("playwright_page")
+            if page is None or page.is_closed():
+                page = await self.pool.checkout(slot)
+                if page is not None:
+                    request.meta["playwright_page"] = page
+        return None
+
+    def process_exception(self, request, exception, spider):
+        if request.meta.pop("context_pending", False):
+            self.pool.release_pending(request.meta.get("playwright_context"))
+
+
+class PageGuardMiddleware:
+    """Cap open Playwright pages at ``PLAYWRIGHT_MAX_OPEN_PAGES`` (tutorial/browser.py).
+
+    A request waits here for a free page slot, which holds its download
+    slot and so backs the scheduler off. Pages of requests that fail for
+    good are closed before the errback runs; pages left open at the end of
+    the crawl are reported and closed.
+    """
+
+    def __init__(self, guard):
+        self.guard = guard
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(PageGuard.from_crawler(crawler))
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    async def process_request(self, request, spider):
+        if not request.meta.get("playwright"):
+            return None
+        # A retried copy keeps the reservation it was made with
+        if not request.meta.get("page_reserved"):
+            await self.guard.reserve()
+            request.meta["page_reserved"] = True
+        add_page_init_callback(request, self.guard.on_page)
+        return None
+
+    def process_response(self, request, response, spider):
+        if request.meta.pop("page_reserved", False):
+            self.guard.release()
+        return response
 
-        with open(proxy_file, 'r') as f:
-            proxies = [f"http://{line.strip()}" for line in f if line.strip()]
-        if not proxies:
-            raise ValueError("proxy-list.txt is empty.")
-        return proxies
+    def process_exception(self, request, exception, spider):
+        if request.meta.pop("page_reserved", False):
+            self.guard.release()
+        self.guard.close(request.meta.get("playwright_page"))
 
-    def rotate_proxy(self):
-        self.proxy_index = (self.proxy_index + 1) % len(self.proxies)
+    def spider_closed(self, spider):
+        self.guard.close_all()
 
-    def get_current_ip(self):
+
+class PageCloseMiddleware:
+    """Spider middleware that closes the response's page once its callback is done.
+
+    Runs whether the callback (or errback) finishes, raises or is filtered
+    out, so callbacks don't need to close ``playwright_page`` themselves.
+    In tab pool mode the page is parked for the next request instead.
+    """
+
+    def __init__(self, guard, contexts):
+        self.guard = guard
+        self.contexts = contexts
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(PageGuard.from_crawler(crawler), ContextPool.from_crawler(crawler))
+
+    def process_spider_output(self, response, result, spider):
         try:
-            response = requests.get("http://checkip.dyndns.org", timeout=5)
-            if response.status_code == 200:
-                match = re.search(r'Current IP Address: ([\d.]+)', response.text)
-                if match:
-                    return match.group(1)
-        except Exception:
-            pass
+            yield from result
+        finally:
+            self.close_page(response)
+
+    async def process_spider_output_async(self, response, result, spider):
+        try:
+            async for entry in result:
+                yield entry
+        finally:
+            self.close_page(response)
+
+    def process_spider_exception(self, response, exception, spider):
+        self.close_page(response)
+
+    def close_page(self, response):
+        if response is None:
+            return
+        page = response.meta.get("playwright_page")
+        if page is not None and self.contexts.checkin(page):
+            self.guard.park(page)
+        else:
+            self.guard.close(page)
+
+
+class StaticFirstMiddleware:
+    """Fetch Playwright requests over plain HTTP first, render only if needed.
+
+    Required selectors come from ``request.meta["static_first"]`` or from the
+    spider's ``static_first_selectors`` dict, keyed by callback name. When
+    any of them is missing from the server HTML (or the fetch fails) the
+    request is sent again through Playwright. The plain attempt goes
+    through the same proxy pool as the browser (``PlaywrightProxyMiddleware``).
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def required_selectors(self, request, spider):
+        if "static_first" in request.meta:
+            return request.meta["static_first"]
+        callback = getattr(request.callback, "__name__", "parse")
+        return getattr(spider, "static_first_selectors", {}).get(callback)
+
+    def process_request(self, request, spider):
+        if not request.meta.get("playwright") or request.meta.get("static_first_escalated"):
+            return None
+        if not self.required_selectors(request, spider):
+            return None
+        request.meta["playwright"] = False
+        request.meta["static_first_pending"] = True
+        return None
+
+    def process_response(self, request, response, spider):
+        if not request.meta.pop("static_first_pending", False):
+            return response
+        selectors = self.required_selectors(request, spider)
+        if response.status == 200 and isinstance(response, TextResponse):
+            missing = [selector for selector in selectors if not response.css(selector)]
+        else:
+            missing = list(selectors)
+        if not missing:
+            self.stats.inc_value("static_first/static")
+            return response
+        spider.logger.debug(f"[StaticFirst] Rendering {request.url}, missing {missing} (status {response.status})")
+        return self.escalate(request, spider)
+
+    def process_exception(self, request, exception, spider):
+        if request.meta.pop("static_first_pending", False):
+            spider.logger.debug(f"[StaticFirst] Rendering {request.url} after {exception!r}")
+            return self.escalate(request, spider)
+        return None
+
+    def escalate(self, request, spider):
+        self.stats.inc_value("static_first/escalated")
+        meta = dict(request.meta, playwright=True, static_first_escalated=True)
+        # The browser gets its own proxy from PlaywrightProxyMiddleware
+        meta.pop("proxy", None)
+        return request.replace(meta=meta, dont_filter=True)
+
+
+class PlaywrightTemplateMiddleware:
+    """Expand ``meta["pw_template"]`` into Playwright meta (tutorial/templates.py).
+
+    Runs before the cache and static-first middlewares, which read the
+    expanded ``playwright`` and ``playwright_page_methods`` keys.
+    """
+
+    def process_request(self, request, spider):
+        name = request.meta.get("pw_template")
+        if name:
+            get_template(name).apply(request)
+        return None
+
+
+class PaginationMiddleware:
+    """Drop listing requests that their Paginator has found to be past the end."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_request(self, request, spider):
+        key = request.meta.get("pagination_key")
+        if key is None:
+            return None
+        paginator = getattr(spider, "paginators", {}).get(key)
+        if paginator and paginator.is_cancelled(request.meta.get("page_num", 0)):
+            self.stats.inc_value("pagination/cancelled")
+            raise IgnoreRequest(f"{key} page {request.meta.get('page_num')} is past the last page")
         return None
+
+
+class AdaptiveThrottleMiddleware:
+    """Per-domain token bucket that speeds up on healthy responses.
+
+    Backs off on 429/503/1015, Cloudflare challenge pages and timeouts. The
+    latency signal is the server's time to first byte, not the Playwright
+    render time. Current rate and concurrency are in ``throttle/<slot>/*``.
+    """
+
+    throttle_codes = {429, 503, 1015}
+    challenge_markers = (b"challenge-platform", b"cf-chl", b"<title>Just a moment...</title>")
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.controllers = RateControllers(crawler.settings)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def slot_key(self, request):
+        return self.crawler.engine.downloader.get_slot_key(request)
+
+    async def process_request(self, request, spider):
+        key = self.slot_key(request)
+        wait = self.controllers.wait_time(key)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if request.meta.get("playwright"):
+            add_page_init_callback(request, record_server_latency)
+        return None
+
+    def process_response(self, request, response, spider):
+        if "cached" in response.flags:
+            return response
+        key = self.slot_key(request)
+        controller = self.controllers.get(key)
+        if response.status in self.throttle_codes or self.is_challenge(response):
+            retry_after = response.headers.get("Retry-After")
+            controller.on_throttled(int(retry_after) if retry_after and retry_after.isdigit() else None)
+            self.stats.inc_value("throttle/backoffs")
+            spider.logger.info(f"[Throttle] Backing off {key}: status {response.status}, {controller.rate * 60:.1f} req/min")
+        elif response.status < 400:
+            latency = request.meta.get("server_latency")
+            if latency is None and not request.meta.get("playwright"):
+                latency = request.meta.get("download_latency")
+            controller.on_success(latency)
+        self.apply(key, controller)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if "Timeout" in type(exception).__name__:
+            key = self.slot_key(request)
+            controller = self.controllers.get(key)
+            controller.on_throttled()
+            self.stats.inc_value("throttle/backoffs")
+            self.apply(key, controller)
+
+    def is_challenge(self, response):
+        if response.headers.get("cf-mitigated") == b"challenge":
+            return True
+        head = response.body[:20000]
+        return any(marker in head for marker in self.challenge_markers)
+
+    def apply(self, key, controller):
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is not None:
+            slot.concurrency = controller.concurrency
+        self.stats.set_value(f"throttle/{key}/rate_per_min", round(controller.rate * 60, 2))
+        self.stats.set_value(f"throttle/{key}/concurrency", controller.concurrency)
+
+
+class RenderedCacheMiddleware(HttpCacheMiddleware):
+    """HTTP cache for Playwright responses (tutorial/httpcache.py).
+
+    Sits before the throttle, proxy and context middlewares so a hit costs
+    neither a token nor a browser. When a conditional revalidation finds
+    the page changed, the plain HTML can't replace the rendered DOM, so the
+    request is sent through Playwright again and the new render is stored.
+    """
+
+    def process_request(self, request, spider):
+        if request.meta.pop("cache_refresh", False):
+            return None
+        return super().process_request(request, spider)
+
+    def process_response(self, request, response, spider):
+        if not request.meta.pop("cache_revalidating", False):
+            return super().process_response(request, response, spider)
+        cachedresponse = request.meta.get("cached_response")
+        if cachedresponse is None or self.policy.is_cached_response_valid(cachedresponse, response, request):
+            return super().process_response(request, response, spider)
+
+        self.stats.inc_value("httpcache/rerender")
+        del request.meta["cached_response"]
+        headers = request.headers.copy()
+        headers.pop(b"If-None-Match", None)
+        headers.pop(b"If-Modified-Since", None)
+        meta = dict(request.meta, playwright=True, cache_refresh=True)
+        return request.replace(meta=meta, headers=headers, dont_filter=True)
+
+
+class IncrementalMiddleware:
+    """Spider middleware that skips products scraped within ``INCREMENTAL_MAX_AGE``.
+
+    Listing callbacks put the product's catalog number in
+    ``meta["index_key"]``. Every product request coming out of a listing
+    marks its product as seen (by that key, or else by URL), so a product
+    whose page then fails to load is not reported as removed; fresh ones
+    are not fetched at all.
+    """
+
+    def __init__(self, index, max_age, stats):
+        self.index = index
+        self.max_age = max_age
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("INCREMENTAL_ENABLED"):
+            raise NotConfigured
+        return cls(
+            ProductIndex.from_crawler(crawler),
+            crawler.settings.getfloat("INCREMENTAL_MAX_AGE", 7 * 86400),
+            crawler.stats,
+        )
+
+    def process_spider_output(self, response, result, spider):
+        for entry in result:
+            if not self.is_fresh(entry, spider):
+                yield entry
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for entry in result:
+            if not self.is_fresh(entry, spider):
+                yield entry
+
+    def is_fresh(self, entry, spider):
+        if not isinstance(entry, Request):
+            return False
+        key = entry.meta.get("index_key")
+        if not key or key == "N/A":
+            if request_kind(entry) == "product":
+                self.index.touch_url(spider.name, entry.url)
+            return False
+        self.index.touch(spider.name, key)
+        if not self.index.is_fresh(spider.name, key, self.max_age):
+            return False
+        self.stats.inc_value("incremental/skipped")
+        return True
+
+
+class ProductFirstMiddleware:
+    """Spider middleware that drains product pages before expanding listings.
+
+    Product requests get ``PRODUCT_PRIORITY`` added to their priority, and
+    listing requests are held back while ``PRODUCT_HIGH_WATER`` product
+    requests are already waiting (see ``ProductBudget``), so the queue stays
+    bounded and items arrive from the first listing page on.
+    """
+
+    def __init__(self, budget, priority):
+        self.budget = budget
+        self.priority = priority
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PRODUCT_FIRST_ENABLED"):
+            raise NotConfigured
+        return cls(ProductBudget.from_crawler(crawler), crawler.settings.getint("PRODUCT_PRIORITY", 10))
+
+    def process_spider_output(self, response, result, spider):
+        for entry in result:
+            if not self.held(entry):
+                yield entry
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for entry in result:
+            if not self.held(entry):
+                yield entry
+
+    def held(self, entry):
+        if not isinstance(entry, Request):
+            return False
+        if request_kind(entry) == "product":
+            entry.priority += self.priority
+            return False
+        return self.budget.hold(entry)
+
+
+class ProductBudgetMiddleware:
+    """Downloader middleware counting product requests as they leave the scheduler."""
+
+    def __init__(self, budget):
+        self.budget = budget
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PRODUCT_FIRST_ENABLED"):
+            raise NotConfigured
+        return cls(ProductBudget.from_crawler(crawler))
+
+    def process_request(self, request, spider):
+        self.budget.dequeued(request)
+        return None
+
+
+class PhaseTimingMiddleware:
+    """Downloader middleware marking when a request leaves the scheduler,
+    and hooking navigation timing into Playwright requests (``PHASE_TIMING_ENABLED``)."""
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PHASE_TIMING_ENABLED"):
+            raise NotConfigured
+        return cls()
+
+    def process_request(self, request, spider):
+        request_times(request)["dequeued"] = now()
+        if request.meta.get("playwright"):
+            add_page_init_callback(request, record_navigation)
+        return None
+
+
+class PhaseTimingSpiderMiddleware:
+    """Spider middleware timing callbacks, and when their items go to the pipelines.
+
+    Next to the spider, so ``callback`` covers the callback itself,
+    including the time its output takes to be consumed.
+    """
+
+    def __init__(self, timings):
+        self.timings = timings
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PHASE_TIMING_ENABLED"):
+            raise NotConfigured
+        return cls(PhaseTimings.from_crawler(crawler))
+
+    def process_spider_output(self, response, result, spider):
+        started = now()
+        try:
+            for entry in result:
+                self.track(response, entry)
+                yield entry
+        finally:
+            self.timings.add(response.url, "callback", now() - started)
+
+    async def process_spider_output_async(self, response, result, spider):
+        started = now()
+        try:
+            async for entry in result:
+                self.track(response, entry)
+                yield entry
+        finally:
+            self.timings.add(response.url, "callback", now() - started)
+
+    def track(self, response, entry):
+        if not isinstance(entry, Request):
+            self.timings.item_started(entry, response.url)
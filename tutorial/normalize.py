@@ -0,0 +1,50 @@
+import pandas as pd
+
+# "10 μg", "0.5 mg", "1,000 ug"; the micro sign comes as both µ and μ
+SIZE_PATTERN = r"(?P<quantity>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>[µμ]?[a-zA-Z]+)"
+PRICE_PATTERN = r"(?P<price>\d[\d,]*(?:\.\d+)?)"
+# A price inside a size label, as R&D shows them ("10 µg $199")
+INLINE_PRICE_PATTERN = r"\$\s*(?P<price>\d[\d,]*(?:\.\d+)?)"
+
+
+def parse_column(values, pattern):
+    """Split each "/"-joined string and extract ``pattern`` from every part.
+
+    Returns the matches as a DataFrame indexed by the position of the
+    original string, with unparsable parts (such as "Buy in bulk") dropped.
+    """
+    parts = pd.Series(values, dtype="object").fillna("").str.split("/").explode()
+    return parts.str.extract(pattern).dropna(how="all")
+
+
+def to_number(column):
+    return pd.to_numeric(column.str.replace(",", "", regex=False), errors="coerce").astype(float)
+
+
+def grouped_lists(column, size):
+    # tolist() gives plain floats and strs, which every exporter can write
+    lists = column.dropna().groupby(level=0).agg(lambda group: group.tolist())
+    return [lists.get(position, []) for position in range(size)]
+
+
+def normalize_offers(offers):
+    """Fill ``quantities``, ``units`` and ``price_values`` of a batch of ``ProteinOffer``.
+
+    Each column is parsed once for the whole batch. Offers without a
+    separate price list get their prices from "$" amounts in the sizes.
+    """
+    count = len(offers)
+    sizes = [offer.sizes for offer in offers]
+
+    parsed = parse_column(sizes, SIZE_PATTERN)
+    quantities = grouped_lists(to_number(parsed["quantity"]), count)
+    units = grouped_lists(parsed["unit"].str.replace("[µμ]", "u", regex=True).str.lower(), count)
+
+    prices = grouped_lists(to_number(parse_column([offer.prices for offer in offers], PRICE_PATTERN)["price"]), count)
+    inline = grouped_lists(to_number(parse_column(sizes, INLINE_PRICE_PATTERN)["price"]), count)
+
+    for position, offer in enumerate(offers):
+        offer.quantities = quantities[position]
+        offer.units = units[position]
+        offer.price_values = prices[position] or inline[position]
+    return offers
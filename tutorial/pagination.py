@@ -0,0 +1,188 @@
+import math
+import re
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
+
+
+def page_url(url, page_num, param="page"):
+    """Return ``url`` with its ``param`` query parameter set to ``page_num``."""
+    parsed_url = urlparse(url)
+    query_params = parse_qs(parsed_url.query)
+    query_params[param] = [str(page_num)]
+    return urlunparse(parsed_url._replace(query=urlencode(query_params, doseq=True)))
+
+
+def parse_total(response, selector):
+    """Read a result count such as "1,234 results" from ``selector``."""
+    text = " ".join(response.css(selector).getall())
+    match = re.search(r"\d[\d,]*", text)
+    return int(match.group().replace(",", "")) if match else None
+
+
+class Paginator:
+    """Keeps a sliding window of listing page requests in flight.
+
+    ``make_request(page_num)`` builds the request for one page; it should
+    put ``pagination_key`` (the key of this paginator in
+    ``spider.paginators``) and ``page_num`` in the meta so that
+    ``PaginationMiddleware`` can drop pages found to be past the end.
+
+    Callbacks report each page through ``done()``, errbacks through
+    ``failed()``; both return the requests that refill the window. At
+    most ``window`` pages are in flight, and none more than ``window``
+    pages past the furthest page reported so far.
+
+    With a shared frontier, workers also report pages that another worker
+    issued: that moves the walk on past them, and the lower pages this
+    worker issued count as handled elsewhere. Pages the frontier drops as
+    another worker's duplicates are given up through ``handed_off()``.
+    """
+
+    def __init__(self, key, make_request, window=3, first_page=1, last_page=None):
+        self.key = key
+        self.make_request = make_request
+        self.window = max(1, window)
+        self.next_page = first_page
+        self.last_page = last_page
+        self.end = None  # first page known to be empty
+        self.reached = first_page - 1  # furthest page done or failed
+        self.in_flight = set()
+
+    def can_issue(self, page_num):
+        if self.last_page is not None and page_num > self.last_page:
+            return False
+        return self.end is None or page_num < self.end
+
+    def fill(self):
+        requests = []
+        while (
+            len(self.in_flight) < self.window
+            and self.next_page <= self.reached + self.window
+            and self.can_issue(self.next_page)
+        ):
+            requests.append(self.make_request(self.next_page))
+            self.in_flight.add(self.next_page)
+            self.next_page += 1
+        return requests
+
+    def done(self, page_num, has_results, total=None, per_page=None):
+        """Record a parsed page; ``total`` results at ``per_page`` caps the last page."""
+        self.reach(page_num)
+        if not has_results:
+            self.mark_end(page_num)
+        elif total is not None and per_page:
+            self.mark_end(math.ceil(total / per_page) + 1)
+        return self.fill()
+
+    def failed(self, page_num):
+        self.reach(page_num)
+        return self.fill()
+
+    def handed_off(self, page_num):
+        """Forget a page another worker has taken over; it reports the page there."""
+        self.in_flight.discard(page_num)
+
+    def reach(self, page_num):
+        if page_num in self.in_flight:
+            self.in_flight.discard(page_num)
+        elif self.can_issue(page_num):
+            # Issued by another worker, which took the pages before it too
+            self.in_flight = {p for p in self.in_flight if p > page_num}
+        self.reached = max(self.reached, page_num)
+        # Pages up to here were issued already, by this worker or another one
+        self.next_page = max(self.next_page, page_num + 1)
+
+    def mark_end(self, page_num):
+        if self.end is None or page_num < self.end:
+            self.end = page_num
+        self.in_flight = {p for p in self.in_flight if p < self.end}
+
+    def is_cancelled(self, page_num):
+        return self.end is not None and page_num >= self.end
+
+    def cursor(self):
+        """Where the walk is, as plain data for ``spider.state``."""
+        return {
+            "next_page": self.next_page,
+            "reached": self.reached,
+            "end": self.end,
+            "in_flight": sorted(self.in_flight),
+        }
+
+    def restore(self, cursor):
+        self.next_page = cursor["next_page"]
+        self.reached = cursor["reached"]
+        self.end = cursor["end"]
+        self.in_flight = set(cursor["in_flight"])
+
+    @property
+    def finished(self):
+        return not self.in_flight and not self.can_issue(self.next_page)
+
+
+class PaginationMixin:
+    """Helpers for spiders whose listing requests come from ``self.paginators``.
+
+    Set ``total_count_selector`` and ``results_per_page`` when the listing
+    shows a result count, so the last page is known from the first response.
+
+    With ``JOBDIR`` the paginators' cursors are kept in ``self.state``, so a
+    resumed crawl carries on where the walk stopped instead of seeding page 1
+    again. Pages that were in flight are still in the job's request queue
+    and are not issued a second time.
+    """
+
+    total_count_selector = None
+    results_per_page = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.listing_dropped, signal=signals.request_dropped)
+        return spider
+
+    def start_paginators(self, paginators):
+        """Set ``self.paginators``; returns the requests starting (or resuming) their walks."""
+        self.paginators = paginators
+        saved = getattr(self, "state", {}).get("paginators", {})
+        requests = []
+        for key, paginator in paginators.items():
+            if key in saved:
+                paginator.restore(saved[key])
+            requests += paginator.fill()
+            self.save_cursor(key)
+        return requests
+
+    def save_cursor(self, key):
+        state = getattr(self, "state", None)  # only set with JOBDIR
+        if state is not None:
+            state.setdefault("paginators", {})[key] = self.paginators[key].cursor()
+
+    def listing_done(self, response, has_results):
+        """Report a parsed listing page; returns the requests refilling the window."""
+        total = None
+        if has_results and self.total_count_selector and self.results_per_page:
+            total = parse_total(response, self.total_count_selector)
+        key = response.meta["pagination_key"]
+        requests = self.paginators[key].done(response.meta["page_num"], has_results, total, self.results_per_page)
+        self.save_cursor(key)
+        return requests
+
+    def listing_dropped(self, request, spider):
+        # A shared frontier already had the page from another worker
+        paginator = getattr(self, "paginators", {}).get(request.meta.get("pagination_key"))
+        if paginator:
+            paginator.handed_off(request.meta["page_num"])
+
+    async def listing_failed(self, failure):
+        request = failure.request
+        if not failure.check(IgnoreRequest):
+            self.logger.warning(f"Listing page failed: {request.url} ({failure.value!r})")
+        key = request.meta.get("pagination_key")
+        if key in self.paginators:
+            requests = self.paginators[key].failed(request.meta["page_num"])
+            self.save_cursor(key)
+            for next_request in requests:
+                yield next_request
@@ -3,11 +3,168 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import csv
+import os
+from datetime import datetime
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import defer, reactor
+
+from tutorial.aliases import AliasIndex
+from tutorial.items import ProteinOffer
+from tutorial.normalize import normalize_offers
+from tutorial.productindex import ProductIndex, item_hash, product_key
 
 
 class TutorialPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class OfferNormalizationPipeline:
+    """Parse sizes and prices of ``ProteinOffer`` items in batches.
+
+    Items wait until ``OFFER_BATCH_SIZE`` have arrived, or at most
+    ``OFFER_FLUSH_INTERVAL`` seconds, and are then parsed together
+    (tutorial/normalize.py) and passed on to the next pipeline.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []  # (item, Deferred fired once the item is parsed)
+        self.flush_call = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint("OFFER_BATCH_SIZE", 100),
+            flush_interval=crawler.settings.getfloat("OFFER_FLUSH_INTERVAL", 5.0),
+        )
+
+    async def process_item(self, item, spider):
+        if not isinstance(item, ProteinOffer):
+            return item
+        parsed = defer.Deferred()
+        self.buffer.append((item, parsed))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        elif self.flush_call is None:
+            # The crawl can't go idle while items wait here, so flush on a timer too
+            self.flush_call = reactor.callLater(self.flush_interval, self.flush)
+        await maybe_deferred_to_future(parsed)
+        return item
+
+    def flush(self):
+        if self.flush_call is not None:
+            if self.flush_call.active():
+                self.flush_call.cancel()
+            self.flush_call = None
+        batch, self.buffer = self.buffer, []
+        if not batch:
+            return
+        try:
+            normalize_offers([item for item, _ in batch])
+        except Exception as exc:
+            for _, parsed in batch:
+                parsed.errback(exc)
+            return
+        for _, parsed in batch:
+            parsed.callback(None)
+
+    def close_spider(self, spider):
+        self.flush()
+
+
+class AliasPipeline:
+    """Tag ``ProteinOffer`` items with the gene symbols their name and gene fields resolve to.
+
+    Symbols and aliases come from the ``ALIAS_TABLE`` file (see
+    tutorial/aliases.py); without one the pipeline is disabled.
+    """
+
+    def __init__(self, index, stats):
+        self.index = index
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("ALIAS_TABLE")
+        if not path:
+            raise NotConfigured
+        return cls(AliasIndex.load(path), crawler.stats)
+
+    def process_item(self, item, spider):
+        if not isinstance(item, ProteinOffer):
+            return item
+        symbols = self.index.resolve(item.name)
+        if item.gene != "N/A":
+            symbols += [symbol for symbol in self.index.resolve(item.gene) if symbol not in symbols]
+        item.gene_symbols = symbols
+        self.stats.inc_value("aliases/resolved" if item.gene_symbols else "aliases/unresolved")
+        return item
+
+
+class IncrementalPipeline:
+    """Pass on only new or changed products (``INCREMENTAL_ENABLED``).
+
+    Every product is recorded in the ``ProductIndex``; unchanged ones are
+    dropped. When the crawl finishes cleanly, products that no listing page
+    of the run showed (and that were not scraped) are written to
+    ``INCREMENTAL_TOMBSTONES_FILE`` and removed from the index; products
+    still listed but whose page failed are kept.
+    """
+
+    def __init__(self, index, tombstones_file, stats):
+        self.index = index
+        self.tombstones_file = tombstones_file
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("INCREMENTAL_ENABLED"):
+            raise NotConfigured
+        pipeline = cls(
+            ProductIndex.from_crawler(crawler),
+            crawler.settings.get("INCREMENTAL_TOMBSTONES_FILE", "%(name)s-removed.csv"),
+            crawler.stats,
+        )
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        key = product_key(adapter)
+        if not key:
+            return item
+        status = self.index.record(spider.name, key, adapter.get("url"), item_hash(adapter.asdict()))
+        self.stats.inc_value(f"incremental/{status}")
+        if status == "unchanged":
+            raise DropItem(f"Unchanged since the last run: {key}")
+        return item
+
+    def spider_closed(self, spider, reason):
+        if reason == "finished":
+            self.write_tombstones(spider)
+        else:
+            spider.logger.info(f"[Incremental] Crawl ended with {reason!r}, not looking for removed products")
+        self.index.close()
+
+    def write_tombstones(self, spider):
+        removed = self.index.missing(spider.name)
+        self.stats.set_value("incremental/removed", len(removed))
+        if not removed:
+            return
+        path = self.tombstones_file % {"name": spider.name}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["vendor", "key", "url", "last_seen"])
+            for key, url, last_seen in removed:
+                writer.writerow([spider.name, key, url, datetime.fromtimestamp(last_seen).isoformat(timespec="seconds")])
+        self.index.delete(spider.name, [key for key, _, _ in removed])
+        spider.logger.info(f"[Incremental] {len(removed)} products removed from the catalog, listed in {path}")
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    vendor TEXT NOT NULL,
+    key TEXT NOT NULL,
+    url TEXT,
+    hash TEXT,
+    first_seen REAL,
+    last_scraped REAL,
+    last_seen REAL,
+    PRIMARY KEY (vendor, key)
+);
+CREATE INDEX IF NOT EXISTS products_url ON products (vendor, url);
+"""
+
+
+def product_key(item):
+    """Catalog number when the vendor has one, otherwise the product URL."""
+    catalog_no = item.get("catalog_no")
+    if catalog_no and catalog_no != "N/A":
+        return str(catalog_no)
+    return item.get("url")
+
+
+def item_hash(item):
+    return hashlib.sha1(json.dumps(dict(item), sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ProductIndex:
+    """Every product scraped so far, per vendor, in one SQLite file.
+
+    ``last_scraped`` is when the product page was last parsed, ``last_seen``
+    when a run last came across the product at all: listed on a listing
+    page (whether its page was then fetched, skipped or failed) or scraped.
+    Products not seen since ``run_started`` are gone from the catalog once
+    the run has finished.
+    """
+
+    def __init__(self, path, commit_every=500):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.commit_every = commit_every
+        self.pending = 0
+        self.run_started = time.time()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # Shared by the spider middleware and the pipeline of one crawl
+        index = getattr(crawler, "product_index", None)
+        if index is None:
+            index = crawler.product_index = cls(crawler.settings["INCREMENTAL_INDEX_PATH"])
+        return index
+
+    def is_fresh(self, vendor, key, max_age):
+        row = self.conn.execute(
+            "SELECT last_scraped FROM products WHERE vendor = ? AND key = ?", (vendor, key)
+        ).fetchone()
+        return row is not None and row[0] is not None and time.time() - row[0] < max_age
+
+    def touch(self, vendor, key):
+        self.write("UPDATE products SET last_seen = ? WHERE vendor = ? AND key = ?", (time.time(), vendor, key))
+
+    def touch_url(self, vendor, url):
+        self.write("UPDATE products SET last_seen = ? WHERE vendor = ? AND url = ?", (time.time(), vendor, url))
+
+    def record(self, vendor, key, url, digest):
+        """Store a scraped product; returns "new", "changed" or "unchanged"."""
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT hash FROM products WHERE vendor = ? AND key = ?", (vendor, key)
+        ).fetchone()
+        if row is None:
+            self.write(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)", (vendor, key, url, digest, now, now, now)
+            )
+            return "new"
+        self.write(
+            "UPDATE products SET url = ?, hash = ?, last_scraped = ?, last_seen = ? WHERE vendor = ? AND key = ?",
+            (url, digest, now, now, vendor, key),
+        )
+        return "unchanged" if row[0] == digest else "changed"
+
+    def missing(self, vendor):
+        return self.conn.execute(
+            "SELECT key, url, last_seen FROM products WHERE vendor = ? AND last_seen < ? ORDER BY key",
+            (vendor, self.run_started),
+        ).fetchall()
+
+    def delete(self, vendor, keys):
+        self.conn.executemany("DELETE FROM products WHERE vendor = ? AND key = ?", [(vendor, key) for key in keys])
+        self.conn.commit()
+
+    def write(self, sql, params):
+        self.conn.execute(sql, params)
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,217 @@
+import os
+import random
+import re
+import time
+
+import requests
+from twisted.internet.defer import DeferredList
+from twisted.internet.threads import deferToThread
+
+
+def check_proxy(proxy, url="http://checkip.dyndns.org", timeout=5):
+    """Fetch ``url`` through ``proxy``. Blocking, run it in a worker thread.
+
+    Returns ``(external_ip, latency)``; ``external_ip`` is None on failure.
+    """
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+    start = time.monotonic()
+    try:
+        response = requests.get(url, proxies=proxies, timeout=timeout)
+        if response.status_code == 200:
+            match = re.search(r'Current IP Address: ([\d.]+)', response.text)
+            if match:
+                return match.group(1), time.monotonic() - start
+    except Exception:
+        pass
+    return None, time.monotonic() - start
+
+
+class ProxyState:
+    def __init__(self, server):
+        self.server = server
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.quarantine_count = 0
+        self.quarantined_until = 0.0
+        self.latency = None  # EWMA over all domains, seconds
+        self.domain_latency = {}
+
+    def is_healthy(self, now):
+        return self.quarantined_until <= now
+
+    @property
+    def success_rate(self):
+        total = self.successes + self.failures
+        return self.successes / total if total else None
+
+
+class ProxyPool:
+    """Health-scored pool over the proxies listed in ``path``.
+
+    Every proxy carries a success rate and an EWMA latency, per vendor
+    domain as well as overall. Proxies that fail ``max_failures`` times in a
+    row are quarantined, and the quarantine doubles each time it is repeated.
+    The file is re-read when its mtime changes, keeping the state of proxies
+    that are still listed.
+    """
+
+    def __init__(self, path, ewma_alpha=0.3, max_failures=3, backoff_base=30,
+                 backoff_max=1800, explore=0.1, reload_interval=30, stats=None):
+        self.path = path
+        self.ewma_alpha = ewma_alpha
+        self.max_failures = max_failures
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.explore = explore
+        self.reload_interval = reload_interval
+        self.stats = stats
+        self.proxies = {}
+        self.mtime = None
+        self.last_reload_check = 0.0
+        self.load()
+
+    @classmethod
+    def from_settings(cls, settings, stats=None):
+        path = settings.get("PROXY_LIST_FILE") or os.path.join(os.path.dirname(__file__), '..', 'proxy-list.txt')
+        return cls(
+            path,
+            ewma_alpha=settings.getfloat("PROXY_POOL_EWMA_ALPHA", 0.3),
+            max_failures=settings.getint("PROXY_POOL_MAX_FAILURES", 3),
+            backoff_base=settings.getfloat("PROXY_POOL_BACKOFF_BASE", 30),
+            backoff_max=settings.getfloat("PROXY_POOL_BACKOFF_MAX", 1800),
+            explore=settings.getfloat("PROXY_POOL_EXPLORE", 0.1),
+            reload_interval=settings.getfloat("PROXY_POOL_RELOAD_INTERVAL", 30),
+            stats=stats,
+        )
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"{os.path.basename(self.path)} not found.")
+
+        with open(self.path, 'r') as f:
+            servers = [f"http://{line.strip()}" for line in f if line.strip()]
+        if not servers:
+            raise ValueError(f"{os.path.basename(self.path)} is empty.")
+
+        self.proxies = {server: self.proxies.get(server) or ProxyState(server) for server in servers}
+        self.mtime = os.path.getmtime(self.path)
+        self.update_stats()
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self.last_reload_check < self.reload_interval:
+            return False
+        self.last_reload_check = now
+        try:
+            if os.path.getmtime(self.path) == self.mtime:
+                return False
+            self.load()
+        except (OSError, ValueError):
+            # Keep the current list while the file is being rewritten
+            return False
+        return True
+
+    def validate(self, url="http://checkip.dyndns.org", timeout=5):
+        """Check every proxy concurrently in worker threads.
+
+        Returns a Deferred that fires once all checks are done.
+        """
+        def on_result(result, state):
+            ip, latency = result
+            if ip:
+                self.record_success(state.server, None, latency)
+                return
+            # Counted as a slow failure, so the proxy ranks last once released
+            self.record_failure(state.server, latency=max(latency, timeout))
+            if state.is_healthy(time.monotonic()):
+                self.quarantine(state)
+
+        checks = []
+        for state in list(self.proxies.values()):
+            d = deferToThread(check_proxy, state.server, url, timeout)
+            d.addCallback(on_result, state)
+            checks.append(d)
+        return DeferredList(checks, consumeErrors=True)
+
+    def get_proxy(self, domain=None):
+        """Pick the healthy proxy with the best expected time per successful
+        request for ``domain``: its latency divided by its success rate.
+
+        Proxies without measurements rank last; with probability
+        ``explore`` a random healthy proxy is used instead, which is how
+        they get tried.
+        """
+        self.maybe_reload()
+        now = time.monotonic()
+        healthy = [state for state in self.proxies.values() if state.is_healthy(now)]
+        if not healthy:
+            # Everything is quarantined: use whatever comes back first
+            return min(self.proxies.values(), key=lambda s: s.quarantined_until).server
+        if random.random() < self.explore:
+            return random.choice(healthy).server
+
+        return min(healthy, key=lambda state: self.score(state, domain)).server
+
+    @staticmethod
+    def score(state, domain=None):
+        latency = state.domain_latency.get(domain, state.latency)
+        if latency is None or not state.success_rate:
+            return float("inf")
+        return latency / state.success_rate
+
+    def ewma(self, previous, value):
+        if previous is None:
+            return value
+        return self.ewma_alpha * value + (1 - self.ewma_alpha) * previous
+
+    def record_success(self, server, domain, latency):
+        state = self.proxies.get(server)
+        if state is None:
+            return
+        state.successes += 1
+        state.consecutive_failures = 0
+        state.quarantine_count = 0
+        state.latency = self.ewma(state.latency, latency)
+        if domain:
+            state.domain_latency[domain] = self.ewma(state.domain_latency.get(domain), latency)
+        self.update_stats(state)
+
+    def record_failure(self, server, domain=None, latency=None):
+        state = self.proxies.get(server)
+        if state is None:
+            return
+        state.failures += 1
+        state.consecutive_failures += 1
+        if latency is not None:
+            # A timeout is a latency sample too, it keeps slow proxies ranked low
+            state.latency = self.ewma(state.latency, latency)
+            if domain:
+                state.domain_latency[domain] = self.ewma(state.domain_latency.get(domain), latency)
+        if state.consecutive_failures >= self.max_failures:
+            self.quarantine(state)
+        self.update_stats(state)
+
+    def quarantine(self, state):
+        backoff = min(self.backoff_base * 2 ** state.quarantine_count, self.backoff_max)
+        state.quarantine_count += 1
+        state.consecutive_failures = 0
+        state.quarantined_until = time.monotonic() + backoff
+        if self.stats:
+            self.stats.inc_value("proxypool/quarantines")
+        self.update_stats(state)
+
+    def update_stats(self, state=None):
+        if not self.stats:
+            return
+        now = time.monotonic()
+        healthy = sum(1 for s in self.proxies.values() if s.is_healthy(now))
+        self.stats.set_value("proxypool/size", len(self.proxies))
+        self.stats.set_value("proxypool/healthy", healthy)
+        self.stats.set_value("proxypool/quarantined", len(self.proxies) - healthy)
+        if state is not None:
+            prefix = f"proxypool/proxy/{state.server}"
+            self.stats.set_value(f"{prefix}/successes", state.successes)
+            self.stats.set_value(f"{prefix}/failures", state.failures)
+            if state.latency is not None:
+                self.stats.set_value(f"{prefix}/latency_ms", round(state.latency * 1000))
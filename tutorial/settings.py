@@ -40,10 +40,18 @@ PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 60000  # 60 seconds
 
 #playwright tags
 DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "http": "tutorial.handlers.PlaywrightDownloadHandler",
+    "https": "tutorial.handlers.PlaywrightDownloadHandler",
 }
 
+# Browser subrequest blocking (tutorial/resources.py); spiders set these in custom_settings
+RESOURCE_BLOCK_TYPES = []  # Playwright resource types, e.g. "image", "font"
+RESOURCE_BLOCK_DOMAINS = []  # host suffixes, "clarity.ms" also blocks "e.clarity.ms"
+RESOURCE_BLOCK_EXTENSIONS = []  # URL path extensions, e.g. ".svg"
+RESOURCE_BLOCK_URL_PATTERNS = []  # plain substrings of the URL
+PLAYWRIGHT_STEALTH = False  # add the stealth init script to every browser context
+PLAYWRIGHT_INIT_SCRIPTS = []  # extra init scripts, added once per context
+
 # Enable the middleware to launch browser
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 PLAYWRIGHT_BROWSER_TYPE = "chromium"  # optional (chromium / firefox / webkit)
@@ -54,13 +62,142 @@ PLAYWRIGHT_LAUNCH_OPTIONS = {
 }
 
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
+# Seen requests in a Bloom filter (mmapped files under JOBDIR) instead of a set
+DUPEFILTER_CLASS = "tutorial.dupefilter.BloomDupeFilter"
+BLOOM_DUPEFILTER_CAPACITY = 1000000  # requests before the filter adds a larger layer
+BLOOM_DUPEFILTER_ERROR_RATE = 1e-6  # chance of a new request being dropped as seen
 FEED_EXPORT_ENCODING = "utf-8"
 
+# Shared frontier: run several `scrapy crawl` processes of one spider with
+# -s SCHEDULER=tutorial.frontier.FrontierScheduler to split its requests
+FRONTIER_PATH = "frontier-%(name)s.sqlite3"
+FRONTIER_LEASE_SECS = 300  # a crashed worker's requests go to the others after this
+
+COMMANDS_MODULE = "tutorial.commands"
+EXTENSIONS = {
+    'tutorial.extensions.StatsFileExtension': 500,  # only with STATS_FILE set
+    'tutorial.extensions.PhaseTimingExtension': 510,
+}
+# Per-request phase timings (queue, middlewares, slot and download or browser,
+# navigation, page methods, callback, pipeline) as p50/p95/p99 per domain
+# in the stats and in PHASE_TIMING_FILE
+PHASE_TIMING_ENABLED = False
+PHASE_TIMING_FILE = "%(name)s-timing.json"
+# scrapy crawlall: every protein spider in parallel worker processes
+CRAWLALL_MAX_WORKERS = 3  # spiders, and so browsers, running at once
+CRAWLALL_MAX_MEMORY_MB = 0  # shared by the workers, browsers included; 0 for no limit
+CRAWLALL_OUTPUT_DIR = "runs"
+CRAWLALL_FORMAT = "csv"
+CRAWLALL_EXCLUDE = ["gentest"]
+# Typed columnar feeds (need pyarrow): -O name.parquet or -O name.arrow
+# CSV feeds join list columns with "/" like sizes and prices
+FEED_EXPORTERS = {
+    "csv": "tutorial.exporters.OfferCsvItemExporter",
+    "parquet": "tutorial.exporters.ParquetItemExporter",
+    "arrow": "tutorial.exporters.ArrowItemExporter",
+}
+
 DOWNLOADER_MIDDLEWARES = {
-    'tutorial.middlewares.PlaywrightProxyMiddleware': 543,
+    'tutorial.middlewares.PhaseTimingMiddleware': 5,
+    'tutorial.middlewares.ProductBudgetMiddleware': 10,
+    'tutorial.frontier.FrontierErrorMiddleware': 50,  # only with the frontier scheduler
+    'tutorial.middlewares.PaginationMiddleware': 100,
+    # Replaces the stock cache (900) so hits skip throttling, proxies and the browser
+    'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': None,
+    'tutorial.middlewares.PlaywrightTemplateMiddleware': 520,
+    'tutorial.middlewares.RenderedCacheMiddleware': 530,
+    'tutorial.middlewares.StaticFirstMiddleware': 540,
+    'tutorial.middlewares.PageGuardMiddleware': 545,
+    # After RetryMiddleware (550) so retried errors still count against the proxy
+    'tutorial.middlewares.AdaptiveThrottleMiddleware': 555,
+    'tutorial.middlewares.PlaywrightProxyMiddleware': 560,
+    'tutorial.middlewares.PlaywrightContextMiddleware': 570,
     'scrapy_user_agents.middlewares.RandomUserAgentMiddleware': 400,
 }
 
+# Proxy egress-IP check: runs through the proxy in a worker thread, cached per proxy
+PROXY_IP_CHECK_URL = "http://checkip.dyndns.org"
+PROXY_IP_CHECK_TTL = 600  # seconds
+PROXY_IP_CHECK_TIMEOUT = 5
+
+# Proxy pool (tutorial/proxypool.py)
+PROXY_LIST_FILE = os.path.join(os.path.dirname(__file__), '..', 'proxy-list.txt')
+PROXY_POOL_VALIDATE_ON_START = True  # check every proxy before the crawl starts
+PROXY_POOL_EWMA_ALPHA = 0.3  # weight of the newest latency sample
+PROXY_POOL_MAX_FAILURES = 3  # consecutive failures before quarantine
+PROXY_POOL_BACKOFF_BASE = 30  # seconds, doubled on every repeated quarantine
+PROXY_POOL_BACKOFF_MAX = 1800
+PROXY_POOL_EXPLORE = 0.1  # share of requests sent to a random healthy proxy
+PROXY_POOL_RELOAD_INTERVAL = 30  # seconds between proxy-list.txt mtime checks
+
+# Adaptive per-domain rate control (tutorial/throttle.py). Replaces DOWNLOAD_DELAY
+# and AutoThrottle: starts at START_DELAY between requests, speeds up while the
+# server answers within TARGET_LATENCY, halves on 429/503/1015, Cloudflare
+# challenges and timeouts. Keep DOWNLOAD_DELAY at 0 when this is on.
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_START_DELAY = 5.0  # seconds between requests at start
+ADAPTIVE_THROTTLE_MIN_DELAY = 1.0  # fastest allowed
+ADAPTIVE_THROTTLE_MAX_DELAY = 120.0  # slowest after back-off
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 4  # per domain
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 5.0  # server time to first byte, seconds
+ADAPTIVE_THROTTLE_INCREASE = 1.0  # requests/minute added per healthy response
+ADAPTIVE_THROTTLE_BACKOFF = 0.5  # rate and concurrency multiplier on back-off
+ADAPTIVE_THROTTLE_JITTER = 0.2  # +-20% on every wait
+
+# Browser context pool (tutorial/browser.py): one warm context per (proxy, vendor)
+PLAYWRIGHT_CONTEXT_MAX_PAGES = 200  # pages served before the context is recycled
+PLAYWRIGHT_CONTEXT_MAX_AGE = 900  # seconds before the context is recycled
+PLAYWRIGHT_CONTEXT_POOL_SIZE = 8  # open contexts across all keys
+PLAYWRIGHT_MAX_OPEN_PAGES = 16  # across all contexts; further requests wait for a page to close
+PLAYWRIGHT_TAB_POOL_SIZE = 0  # pages kept per context and navigated again; 0 closes every page
+PLAYWRIGHT_TAB_MAX_USES = 50  # navigations before a pooled tab is closed
+PLAYWRIGHT_TAB_MAX_HEAP_MB = 256  # JS heap (Chromium) above which a pooled tab is closed
+
+# Incremental mode (tutorial/productindex.py): skip products scraped within
+# INCREMENTAL_MAX_AGE, emit only new or changed ones and list removed products.
+# scrapy crawl genscript -s INCREMENTAL_ENABLED=1 -O output/incremental/genscript-changes.csv
+INCREMENTAL_ENABLED = False
+INCREMENTAL_INDEX_PATH = os.path.join(os.path.dirname(__file__), '..', 'product-index.sqlite3')
+INCREMENTAL_MAX_AGE = 7 * 86400  # seconds
+# Kept apart from the vendor feeds, which csv_to_excel.py turns into sheets
+INCREMENTAL_TOMBSTONES_FILE = "output/incremental/%(name)s-removed.csv"
+
+SPIDER_MIDDLEWARES = {
+    # Next to the engine: a request is done once all of its output is through
+    'tutorial.frontier.FrontierAckMiddleware': 10,  # only with the frontier scheduler
+    'tutorial.middlewares.ProductFirstMiddleware': 450,
+    'tutorial.middlewares.IncrementalMiddleware': 500,
+    'tutorial.middlewares.PhaseTimingSpiderMiddleware': 940,
+    # Closest to the spider, so it sees callback exceptions first
+    'tutorial.middlewares.PageCloseMiddleware': 950,
+}
+
+# Product pages before listing pages (tutorial/budget.py): product requests get
+# PRODUCT_PRIORITY more, and listings wait while PRODUCT_HIGH_WATER products are queued
+PRODUCT_FIRST_ENABLED = True
+PRODUCT_PRIORITY = 10
+PRODUCT_HIGH_WATER = 200
+PRODUCT_LOW_WATER = 0  # listings resume below this; 0 for half the high-water mark
+
+ITEM_PIPELINES = {
+    'tutorial.pipelines.OfferNormalizationPipeline': 300,
+    'tutorial.pipelines.AliasPipeline': 310,
+    'tutorial.pipelines.IncrementalPipeline': 800,
+}
+OFFER_BATCH_SIZE = 100  # items parsed together by OfferNormalizationPipeline
+OFFER_FLUSH_INTERVAL = 5.0  # seconds a partial batch may wait
+# Symbol -> aliases table (HGNC-style CSV/TSV/XLSX) for AliasPipeline; None disables it
+ALIAS_TABLE = None
+
+# Rendered-page cache (tutorial/httpcache.py), for development runs and partial
+# recrawls: scrapy crawl genscript -s HTTPCACHE_ENABLED=1
+HTTPCACHE_ENABLED = False
+HTTPCACHE_GZIP = True
+HTTPCACHE_EXPIRATION_SECS = 0  # entries stay on disk; RENDERED_CACHE_TTL decides freshness
+HTTPCACHE_STORAGE = "tutorial.httpcache.RenderedCacheStorage"
+HTTPCACHE_POLICY = "tutorial.httpcache.RenderedCachePolicy"
+RENDERED_CACHE_TTL = 86400  # seconds before an entry is revalidated, 0 = never
+
 LOG_ENABLED = True
 LOG_LEVEL = 'DEBUG'  # or 'INFO', 'WARNING', etc.
 LOG_FILE = os.path.join(os.path.dirname(__file__), '..', 'log.txt')
@@ -9,13 +9,16 @@ class GenScriptSpider(scrapy.Spider):
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "DOWNLOAD_DELAY": 3,
-        "RANDOMIZE_DOWNLOAD_DELAY": True,
         "CONCURRENT_REQUESTS": 1,
-        "AUTOTHROTTLE_ENABLED": True,
-        "AUTOTHROTTLE_START_DELAY": 3,
-        "AUTOTHROTTLE_MAX_DELAY": 5,
-        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
+        "ADAPTIVE_THROTTLE_START_DELAY": 3,
+        "ADAPTIVE_THROTTLE_MAX_DELAY": 5,
+        "ADAPTIVE_THROTTLE_MAX_CONCURRENCY": 1,
+        "RESOURCE_BLOCK_TYPES": ["font", "stylesheet", "image", "media", "document"],
+        "RESOURCE_BLOCK_DOMAINS": [
+            "webanalytics.internet.genscript.com",
+            "clarity.ms",
+            "aria.microsoft.com",
+        ],
     }
 
     # Alphabet letters to iterate through
@@ -31,9 +34,6 @@ class GenScriptSpider(scrapy.Spider):
             meta={
                 "playwright": True,
                 "playwright_include_page": True,
-                "playwright_page_methods": [
-                    {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                ],
                 "page_num": start_page,
                 "letter_index": 0,
                 "letter": start_letter,
@@ -41,23 +41,6 @@ class GenScriptSpider(scrapy.Spider):
             callback=self.parse
         )
 
-    def block_resources(self, route, request):
-        blocked_types = {"font", "stylesheet", "image", "media", "document"}
-        if request.resource_type in blocked_types:
-            return route.abort()
-
-        blocked_domains = [
-            "webanalytics.internet.genscript.com",
-            "e.clarity.ms",
-            "clarity.ms",
-            "aria.microsoft.com",
-            "browser.pipe.aria.microsoft.com"
-        ]
-        if any(domain in request.url for domain in blocked_domains):
-            return route.abort()
-
-        return route.continue_()
-
     async def parse(self, response):
         page = response.meta["playwright_page"]
         current_page_num = response.meta.get("page_num", 1)
@@ -84,9 +67,6 @@ class GenScriptSpider(scrapy.Spider):
                 meta={
                     "playwright": True,
                     "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
                     "page_num": 1,
                     "letter_index": next_letter_index,
                     "letter": next_letter,
@@ -108,9 +88,6 @@ class GenScriptSpider(scrapy.Spider):
                 meta={
                     "playwright": True,
                     "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
                     "catalog_no": catalog_no,
                     "name": name,
                 },
@@ -135,9 +112,6 @@ class GenScriptSpider(scrapy.Spider):
                 meta={
                     "playwright": True,
                     "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
                     "page_num": 1,
                     "letter_index": next_letter_index,
                     "letter": next_letter,
@@ -161,9 +135,6 @@ class GenScriptSpider(scrapy.Spider):
             meta={
                 "playwright": True,
                 "playwright_include_page": True,
-                "playwright_page_methods": [
-                    {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                ],
                 "page_num": next_page_num,
                 "letter_index": letter_index,
                 "letter": letter,
@@ -1,7 +1,14 @@
 import scrapy
-from urllib.parse import urlparse, urlunparse
+from functools import partial
 
-class GenScriptSpider(scrapy.Spider):
+from tutorial.items import ProteinOffer
+from tutorial.pagination import PaginationMixin, Paginator
+from tutorial.templates import register_template
+
+LISTING = register_template("genscript_listing")
+PRODUCT = register_template("genscript_product")
+
+class GenScriptSpider(PaginationMixin, scrapy.Spider):
     name = 'genscript'
 
     # Start at letter A, page 1
@@ -9,92 +16,63 @@ class GenScriptSpider(scrapy.Spider):
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "DOWNLOAD_DELAY": 60,
-        "RANDOMIZE_DOWNLOAD_DELAY": False,
-        "CONCURRENT_REQUESTS": 1,
-        "AUTOTHROTTLE_ENABLED": True,
-        "AUTOTHROTTLE_START_DELAY": 60,
-        "AUTOTHROTTLE_MAX_DELAY": 120,
-        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
+        "CONCURRENT_REQUESTS": 4,
+        "ADAPTIVE_THROTTLE_START_DELAY": 60,
+        "ADAPTIVE_THROTTLE_MIN_DELAY": 10,
+        "ADAPTIVE_THROTTLE_MAX_DELAY": 120,
+        "RESOURCE_BLOCK_TYPES": ["font", "stylesheet", "image", "media", "document"],
+        "RESOURCE_BLOCK_DOMAINS": [
+            "webanalytics.internet.genscript.com",
+            "clarity.ms",
+            "aria.microsoft.com",
+        ],
     }
 
     # Alphabet letters to iterate through
     letters = [chr(c) for c in range(ord('A'), ord('Z') + 1)]
 
+    # Product pages are server-rendered; only open a browser if these are missing
+    static_first_selectors = {
+        "parse_product": ["table.gridtable", "span.size-box"],
+    }
+
+    # Listing pages per letter (the site never goes past 15)
+    max_pages = 15
+
+    # Listing pages in flight per letter; 15 seeds every page up front.
+    # Override with -a listing_window=N
+    listing_window = 3
+
     def start_requests(self):
-        # Start with first letter A, page 1
-        start_letter = 'A'
-        start_page = 1
-        url = f'https://www.genscript.com/protein-list/{start_letter}/{start_page}.html'
-        yield scrapy.Request(
-            url,
+        window = int(self.listing_window)
+        yield from self.start_paginators({
+            letter: Paginator(letter, partial(self.listing_request, letter), window=window, last_page=self.max_pages)
+            for letter in self.letters
+        })
+
+    def listing_request(self, letter, page_num):
+        return scrapy.Request(
+            f'https://www.genscript.com/protein-list/{letter}/{page_num}.html',
             meta={
-                "playwright": True,
-                "playwright_include_page": True,
-                "playwright_page_methods": [
-                    {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                ],
-                "page_num": start_page,
-                "letter_index": 0,
-                "letter": start_letter,
+                "pw_template": LISTING,
+                "pagination_key": letter,
+                "page_num": page_num,
+                "letter": letter,
             },
-            callback=self.parse
+            callback=self.parse,
+            errback=self.listing_failed,
+            dont_filter=True,
         )
 
-    def block_resources(self, route, request):
-        blocked_types = {"font", "stylesheet", "image", "media", "document"}
-        if request.resource_type in blocked_types:
-            return route.abort()
-
-        blocked_domains = [
-            "webanalytics.internet.genscript.com",
-            "e.clarity.ms",
-            "clarity.ms",
-            "aria.microsoft.com",
-            "browser.pipe.aria.microsoft.com"
-        ]
-        if any(domain in request.url for domain in blocked_domains):
-            return route.abort()
-
-        return route.continue_()
-
     async def parse(self, response):
-        page = response.meta["playwright_page"]
         current_page_num = response.meta.get("page_num", 1)
-        letter_index = response.meta.get("letter_index", 0)
         letter = response.meta.get("letter", "A")
 
         self.logger.info(f"Scraping letter {letter} page {current_page_num}: {response.url}")
 
         rows = response.css('tr.gridtable-tr')
         if not rows:
-            self.logger.info(f"No products found on letter {letter} page {current_page_num}, moving to next letter.")
-            await page.close()
-
-            # Move to next letter
-            next_letter_index = letter_index + 1
-            if next_letter_index >= len(self.letters):
-                self.logger.info("Completed all letters. Spider finished.")
-                return
-
-            next_letter = self.letters[next_letter_index]
-            next_url = f'https://www.genscript.com/protein-list/{next_letter}/1.html'
-            yield scrapy.Request(
-                next_url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
-                    "page_num": 1,
-                    "letter_index": next_letter_index,
-                    "letter": next_letter,
-                },
-                callback=self.parse,
-                dont_filter=True,
-            )
-            return
+            self.logger.info(f"No products found on letter {letter} page {current_page_num}, letter {letter} is done.")
 
         # Process each product row
         for row in rows:
@@ -106,76 +84,19 @@ class GenScriptSpider(scrapy.Spider):
             yield scrapy.Request(
                 url,
                 meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
+                    "pw_template": PRODUCT,
                     "catalog_no": catalog_no,
                     "name": name,
+                    "index_key": catalog_no,
                 },
                 callback=self.parse_product,
             )
 
-        # Next page for current letter
-        next_page_num = current_page_num + 1
-        if next_page_num > 15:
-            self.logger.info(f"Reached page limit for letter {letter}, moving to next letter.")
-            await page.close()
-
-            next_letter_index = letter_index + 1
-            if next_letter_index >= len(self.letters):
-                self.logger.info("Completed all letters. Spider finished.")
-                return
-
-            next_letter = self.letters[next_letter_index]
-            next_url = f'https://www.genscript.com/protein-list/{next_letter}/1.html'
-            yield scrapy.Request(
-                next_url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                    ],
-                    "page_num": 1,
-                    "letter_index": next_letter_index,
-                    "letter": next_letter,
-                },
-                callback=self.parse,
-                dont_filter=True,
-            )
-            return
-
-        # Construct next page URL for the same letter
-        parsed_url = urlparse(response.url)
-        parts = parsed_url.path.split("/")
-        parts[-1] = f"{next_page_num}.html"
-        new_path = "/".join(parts)
-        next_url = urlunparse(parsed_url._replace(path=new_path))
-
-        self.logger.info(f"Going to next page {next_page_num} of letter {letter}: {next_url}")
-
-        yield scrapy.Request(
-            next_url,
-            meta={
-                "playwright": True,
-                "playwright_include_page": True,
-                "playwright_page_methods": [
-                    {"method": "route", "args": ["**/*"], "kwargs": {"handler": self.block_resources}}
-                ],
-                "page_num": next_page_num,
-                "letter_index": letter_index,
-                "letter": letter,
-            },
-            callback=self.parse,
-            dont_filter=True,
-        )
-
-        await page.close()
+        # Keep the letter's window full; stops at the first empty page
+        for request in self.listing_done(response, bool(rows)):
+            yield request
 
     async def parse_product(self, response):
-        page = response.meta["playwright_page"]
         catalog_no = response.meta["catalog_no"]
         name = response.meta["name"]
 
@@ -218,15 +139,14 @@ class GenScriptSpider(scrapy.Spider):
         sizes_joined = "/".join(sizes)
         prices_joined = "/".join(prices)
 
-        await page.close()
-
-        yield {
-            "catalog_no": catalog_no,
-            "name": name,
-            "sizes": sizes_joined,
-            "prices": prices_joined,
-            "purity": purity,
-            "endotoxin_level": endotoxin_level,
-            "expression_system": expression_system,
-            "url": response.url,
-        }
+        yield ProteinOffer(
+            vendor=self.name,
+            catalog_no=catalog_no,
+            name=name,
+            sizes=sizes_joined,
+            prices=prices_joined,
+            purity=purity,
+            endotoxin_level=endotoxin_level,
+            expression_system=expression_system,
+            url=response.url,
+        )
@@ -1,9 +1,23 @@
 import scrapy
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from scrapy_playwright.page import PageMethod
 
+from tutorial.extract import listing_links
+from tutorial.items import ProteinOffer
+from tutorial.pagination import PaginationMixin, Paginator, page_url
+from tutorial.templates import register_template
 
-class NovusBioSpider(scrapy.Spider):
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+}
+
+PAGE = register_template(
+    "novusbio_page",
+    page_methods=[PageMethod("set_extra_http_headers", HEADERS)],
+    goto_kwargs={"wait_until": "load"},
+)
+
+
+class NovusBioSpider(PaginationMixin, scrapy.Spider):
     name = 'novusbio'
     start_urls = [
         'https://www.novusbio.com/search?category=Peptides%20and%20Proteins&keywords=protein&page=1'
@@ -11,111 +25,84 @@ class NovusBioSpider(scrapy.Spider):
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "DOWNLOAD_DELAY": 5,
-        "RANDOMIZE_DOWNLOAD_DELAY": True,
-        "CONCURRENT_REQUESTS": 1,
-        "AUTOTHROTTLE_ENABLED": False,
+        "CONCURRENT_REQUESTS": 4,
+        "ADAPTIVE_THROTTLE_START_DELAY": 5,
+        "ADAPTIVE_THROTTLE_MIN_DELAY": 1,
         "RETRY_ENABLED": True,
         "RETRY_TIMES": 3,
         "RETRY_HTTP_CODES": [404, 429, 500, 503, 1015],
         "PLAYWRIGHT_LAUNCH_OPTIONS": {
             "headless": True,
             "args": ["--disable-http2"]
-        }
+        },
+        "PLAYWRIGHT_STEALTH": True,
+        #"RESOURCE_BLOCK_TYPES": ["font", "stylesheet", "image", "media", "document"],
+        "RESOURCE_BLOCK_TYPES": ["font", "image"],
+        "RESOURCE_BLOCK_DOMAINS": [
+            "bam.nr-data.net", "googletagmanager.com", "google-analytics.com",
+            "clarity.ms", "doubleclick.net", "outbrain.com"
+        ],
+        "RESOURCE_BLOCK_URL_PATTERNS": ["novusbio.com/ajax", "://ads."],
     }
 
-    def start_requests(self):
-        for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta=self.get_playwright_meta(1),
-                headers=self.get_headers(),
-                callback=self.parse
-            )
+    # Listing pages in flight; override with -a listing_window=N
+    listing_window = 4
+    max_pages = 3180
 
-    def block_resources(self, route, request):
-        #blocked_types = {"font", "stylesheet", "image", "media", "document"}
-        blocked_types = {"font", "image"}
-        blocked_domains = [
-            "bam.nr-data.net", "googletagmanager.com", "google-analytics.com",
-            "clarity.ms", "novusbio.com/ajax", "ads.", "doubleclick.net", "outbrain.com"
-        ]
-        if request.resource_type in blocked_types or any(domain in request.url for domain in blocked_domains):
-            return route.abort()
-        return route.continue_()
+    def start_requests(self):
+        yield from self.start_paginators({
+            "listing": Paginator("listing", self.listing_request, window=int(self.listing_window), last_page=self.max_pages)
+        })
+
+    def listing_request(self, page_num):
+        meta = self.get_playwright_meta(page_num)
+        meta["pagination_key"] = "listing"
+        return scrapy.Request(
+            page_url(self.start_urls[0], page_num),
+            meta=meta,
+            callback=self.parse,
+            errback=self.listing_failed,
+            headers=self.get_headers(),
+            dont_filter=True
+        )
 
     def get_headers(self):
-        return {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-        }
+        return HEADERS
 
     def get_playwright_meta(self, page_num):
         return {
-            "playwright": True,
-            "playwright_include_page": True,
-            "playwright_page_methods": [
-                PageMethod("route", "**/*", self.block_resources),
-                PageMethod("add_init_script", "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"),
-                PageMethod("add_init_script", "window.chrome = { runtime: {} };"),
-                PageMethod("add_init_script", "Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3]})"),
-                PageMethod("add_init_script", "Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})"),
-                PageMethod("set_extra_http_headers", self.get_headers()),
-            ],
-            "playwright_page_goto_kwargs": {"wait_until": "load"},
+            "pw_template": PAGE,
             "page_num": page_num
         }
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
         current_page_num = response.meta.get("page_num", 1)
         self.logger.info(f"Scraping page {current_page_num}: {response.url}")
 
-        product_links = response.css("h2.col3_hdr > a.ecommerce_link")
+        product_links = listing_links(response.css("h2.col3_hdr > a.ecommerce_link"), text="span::text")
 
         if not product_links:
             self.logger.info(f"No products found on page {current_page_num}.")
-            await page.close()
-            return
 
         for link in product_links:
-            name = link.css("span::text").get(default="N/A").strip()
-            url = response.urljoin(link.css("::attr(href)").get())
-            catalog_no = link.attrib.get("data-id", "N/A")
+            name = link.text or "N/A"
+            url = response.urljoin(link.href)
+            catalog_no = link.data.get("id", "N/A")
+            meta = self.get_playwright_meta(current_page_num)
+            meta["index_key"] = catalog_no
 
             yield scrapy.Request(
                 url,
-                meta=self.get_playwright_meta(current_page_num),
+                meta=meta,
                 callback=self.parse_product,
                 cb_kwargs={"catalog_no": catalog_no, "name": name},
                 headers=self.get_headers()
             )
 
-        next_page_num = current_page_num + 1
-        if next_page_num > 3180:
-            self.logger.info("Reached max page limit. Stopping.")
-            await page.close()
-            return
-
-        parsed_url = urlparse(response.url)
-        query_params = parse_qs(parsed_url.query)
-        query_params["page"] = [str(next_page_num)]
-        new_query = urlencode(query_params, doseq=True)
-        next_url = urlunparse(parsed_url._replace(query=new_query))
-
-        self.logger.info(f"Navigating to next page: {next_url}")
-        yield scrapy.Request(
-            next_url,
-            meta=self.get_playwright_meta(next_page_num),
-            callback=self.parse,
-            headers=self.get_headers(),
-            dont_filter=True
-        )
-
-        await page.close()
+        for request in self.listing_done(response, bool(product_links)):
+            yield request
 
     async def parse_product(self, response, catalog_no, name):
-        page = response.meta["playwright_page"]
-
         sizes = []
         prices = []
         for row in response.css("table.sticky-enabled tr.odd"):
@@ -134,17 +121,17 @@ class NovusBioSpider(scrapy.Spider):
         purity = response.xpath("//table[contains(@class, 'ds_list') and contains(@class, 'wide')]//tr[td/strong[text()='Purity']]/td[2]/div/text()").get(default="N/A").strip()
         endotoxin = response.xpath("//table[contains(@class, 'ds_list') and contains(@class, 'wide')]//tr[td/strong[contains(text(),'Endotoxin')]]/td[2]/div/text()").get(default="N/A").strip()
 
-        await page.close()
-
-        yield {
-            "catalog_no": catalog_no,
-            "name": name,
-            "sizes": "/".join(sizes) if sizes else "N/A",
-            "prices": "/".join(prices) if prices else "N/A",
-            "reactivity": reactivity,
-            "application": application,
-            "format": format_,
-            "gene": gene,
-            "purity": purity,
-            "endotoxin": endotoxin,
-        }
+        yield ProteinOffer(
+            vendor=self.name,
+            catalog_no=catalog_no,
+            name=name,
+            sizes="/".join(sizes) if sizes else "N/A",
+            prices="/".join(prices) if prices else "N/A",
+            reactivity=reactivity,
+            applications=application,
+            format=format_,
+            gene=gene,
+            purity=purity,
+            endotoxin_level=endotoxin,
+            url=response.url,
+        )
@@ -1,6 +1,38 @@
 import scrapy
 from scrapy_playwright.page import PageMethod
 
+from tutorial.extract import listing_links
+from tutorial.items import ProteinOffer
+from tutorial.templates import register_template
+
+# Scrolls until the page height stops growing (five checks a second apart)
+SCROLL_TO_END = """
+    async () => {
+        let prevHeight = 0;
+        let sameCount = 0;
+        while (sameCount < 5) {
+            window.scrollBy(0, 2000);
+            await new Promise(r => setTimeout(r, 1000));
+            const currHeight = document.body.scrollHeight;
+            if (currHeight === prevHeight) {
+                sameCount++;
+            } else {
+                sameCount = 0;
+                prevHeight = currHeight;
+            }
+        }
+    }
+"""
+
+LISTING = register_template("ptglab_listing", page_methods=[
+    PageMethod("evaluate", SCROLL_TO_END),
+    PageMethod("wait_for_timeout", 2000),
+])
+PRODUCT = register_template("ptglab_product", page_methods=[
+    PageMethod("wait_for_selector", "div.sizes-box_sizeList__Kr6Gg button"),
+    PageMethod("click", "div.sizes-box_sizeList__Kr6Gg button"),
+    PageMethod("wait_for_timeout", 2000),
+])
 
 class PTGLabSpider(scrapy.Spider):
     name = "ptglab"
@@ -8,71 +40,31 @@ class PTGLabSpider(scrapy.Spider):
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "DOWNLOAD_DELAY": 60,
-        "RANDOMIZE_DOWNLOAD_DELAY": False,
-        "CONCURRENT_REQUESTS": 1,
-        "AUTOTHROTTLE_ENABLED": True,
-        "AUTOTHROTTLE_START_DELAY": 60,
-        "AUTOTHROTTLE_MAX_DELAY": 120,
-        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
+        "CONCURRENT_REQUESTS": 4,
+        "ADAPTIVE_THROTTLE_START_DELAY": 60,
+        "ADAPTIVE_THROTTLE_MIN_DELAY": 10,
+        "ADAPTIVE_THROTTLE_MAX_DELAY": 120,
     }
 
     def start_requests(self):
         for url in self.start_urls:
             yield scrapy.Request(
                 url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        PageMethod("evaluate", """
-                            async () => {
-                                let prevHeight = 0;
-                                let sameCount = 0;
-                                while (sameCount < 5) {
-                                    window.scrollBy(0, 2000);
-                                    await new Promise(r => setTimeout(r, 1000));
-                                    const currHeight = document.body.scrollHeight;
-                                    if (currHeight === prevHeight) {
-                                        sameCount++;
-                                    } else {
-                                        sameCount = 0;
-                                        prevHeight = currHeight;
-                                    }
-                                }
-                            }
-                        """),
-                        PageMethod("wait_for_timeout", 2000),
-                    ],
-                },
+                meta={"pw_template": LISTING},
                 callback=self.parse_listing,
             )
 
     async def parse_listing(self, response):
-        page = response.meta["playwright_page"]
-
-        product_links = response.css('div[data-category="HumanKine"] a::attr(href)').getall()
+        product_links = listing_links(response.css('div[data-category="HumanKine"] a'))
         for link in product_links:
-            full_url = response.urljoin(link)
+            full_url = response.urljoin(link.href)
             yield scrapy.Request(
                 full_url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        PageMethod("wait_for_selector", "div.sizes-box_sizeList__Kr6Gg button"),
-                        PageMethod("click", "div.sizes-box_sizeList__Kr6Gg button"),
-                        PageMethod("wait_for_timeout", 2000),
-                    ],
-                },
+                meta={"pw_template": PRODUCT},
                 callback=self.parse_product
             )
 
-        await page.close()
-
     async def parse_product(self, response):
-        page = response.meta["playwright_page"]
-
         def sel_text(selector, default="N/A"):
             value = response.css(selector).get()
             return value.strip() if value else default
@@ -86,15 +78,14 @@ class PTGLabSpider(scrapy.Spider):
         sizes = [s.strip() for s in response.css("div.magic-dropdown-box li::text").getall() if s.strip()]
         prices = [p.strip() for p in response.css("div.magic-dropdown-box li span::text").getall() if "$" in p]
 
-        await page.close()
-
-        yield {
-            "name": name,
-            "catalog_no": cat_no,
-            "size": "/".join(sizes) if sizes else "N/A",
-            "price": "/".join(prices) if prices else "N/A",
-            "expression_system": expression,
-            "purity": purity,
-            "endotoxin_level": endotoxin,
-            "url": response.url,
-        }
+        yield ProteinOffer(
+            vendor=self.name,
+            name=name,
+            catalog_no=cat_no,
+            sizes="/".join(sizes) if sizes else "N/A",
+            prices="/".join(prices) if prices else "N/A",
+            expression_system=expression,
+            purity=purity,
+            endotoxin_level=endotoxin,
+            url=response.url,
+        )
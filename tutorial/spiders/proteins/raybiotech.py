@@ -1,173 +1,92 @@
 import scrapy
-from urllib.parse import urlparse, urlunparse
 from scrapy_playwright.page import PageMethod
 
-async def stealth(page):
-    await page.add_init_script("""
-        Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-        window.chrome = {runtime: {}};
-        Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
-        Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-    """)
-
-class RayBiotechSpider(scrapy.Spider):
+from tutorial.extract import listing_links
+from tutorial.items import ProteinOffer
+from tutorial.pagination import PaginationMixin, Paginator, page_url
+from tutorial.templates import register_template
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+LISTING = register_template("raybiotech_listing", page_methods=[
+    PageMethod("set_viewport_size", {"width": 1920, "height": 1080}),
+    PageMethod("wait_for_selector", "h3.result-title"),
+])
+PRODUCT = register_template("raybiotech_product", page_methods=[
+    PageMethod("set_viewport_size", {"width": 1920, "height": 1080}),
+    PageMethod("wait_for_selector", "span.base"),
+])
+
+class RayBiotechSpider(PaginationMixin, scrapy.Spider):
     name = 'raybiotech'
     start_urls = ['https://www.raybiotech.com/proteins-and-peptides-products/recombinant-proteins?page=1']
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "DOWNLOAD_DELAY": 30,
-        "RANDOMIZE_DOWNLOAD_DELAY": True,
-        "CONCURRENT_REQUESTS": 1,
-        "AUTOTHROTTLE_ENABLED": True,
-        "AUTOTHROTTLE_START_DELAY": 30,
-        "AUTOTHROTTLE_MAX_DELAY": 60,
-        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
-    }
-
-    def block_resources(self, route, request):
-        blocked_types = {"image", "media", "font", "stylesheet"}
-        blocked_domains = [
+        "CONCURRENT_REQUESTS": 4,
+        "ADAPTIVE_THROTTLE_START_DELAY": 30,
+        "ADAPTIVE_THROTTLE_MIN_DELAY": 5,
+        "ADAPTIVE_THROTTLE_MAX_DELAY": 60,
+        "PLAYWRIGHT_STEALTH": True,
+        "RESOURCE_BLOCK_TYPES": ["image", "media", "font", "stylesheet"],
+        "RESOURCE_BLOCK_DOMAINS": [
             "analytics.google.com",
             "googletagmanager.com",
             "google-analytics.com",
             "clarity.ms",
             "cloudflare.com",
-            "wp-admin/admin-ajax.php"
-        ]
+        ],
+        "RESOURCE_BLOCK_URL_PATTERNS": ["wp-admin/admin-ajax.php"],
+    }
 
-        if request.resource_type in blocked_types or any(d in request.url for d in blocked_domains):
-            return route.abort()
-        return route.continue_()
+    # Listing pages in flight; override with -a listing_window=N
+    listing_window = 3
+    max_pages = 15
 
     def start_requests(self):
-        for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-                    "Accept-Language": "en-US,en;q=0.9",
-                },
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {
-                            "method": "route",
-                            "args": ["**/*"],
-                            "kwargs": {"handler": self.block_resources}
-                        },
-                        {
-                            "method": "set_viewport_size",
-                            "args": [{"width": 1920, "height": 1080}]
-                        },
-                        {
-                            "method": "wait_for_selector",
-                            "args": ["h3.result-title"]
-                        },
-                    ],
-                    "page_num": 1
-                },
-                callback=self.parse
-            )
+        yield from self.start_paginators({
+            "listing": Paginator("listing", self.listing_request, window=int(self.listing_window), last_page=self.max_pages)
+        })
+
+    def listing_request(self, page_num):
+        return scrapy.Request(
+            page_url(self.start_urls[0], page_num),
+            headers=HEADERS,
+            meta={
+                "pw_template": LISTING,
+                "pagination_key": "listing",
+                "page_num": page_num
+            },
+            callback=self.parse,
+            errback=self.listing_failed,
+            dont_filter=True
+        )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await stealth(page)
-
         current_page_num = response.meta.get("page_num", 1)
 
         self.logger.info(f"Scraping listing page {current_page_num}: {response.url}")
 
-        product_links = response.css("a.result").xpath('./h3[contains(@class,"result-title")]/ancestor::a/@href').getall()
+        product_links = listing_links(response.css("a.result").xpath('self::a[h3[contains(@class,"result-title")]]'))
         if not product_links:
             self.logger.warning("No products found. The page may not have fully rendered.")
-            await page.close()
-            return
 
         for link in product_links:
-            full_url = response.urljoin(link)
+            full_url = response.urljoin(link.href)
             yield scrapy.Request(
                 full_url,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-                    "Accept-Language": "en-US,en;q=0.9",
-                },
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        {
-                            "method": "route",
-                            "args": ["**/*"],
-                            "kwargs": {"handler": self.block_resources}
-                        },
-                        {
-                            "method": "set_viewport_size",
-                            "args": [{"width": 1920, "height": 1080}]
-                        },
-                        {
-                            "method": "wait_for_selector",
-                            "args": ["span.base"]
-                        },
-                    ],
-                },
+                headers=HEADERS,
+                meta={"pw_template": PRODUCT},
                 callback=self.parse_product
             )
 
-        # Pagination
-        next_page_num = current_page_num + 1
-        if next_page_num > 15:
-            self.logger.info("Page limit reached, stopping crawl.")
-            await page.close()
-            return
-
-        parsed_url = urlparse(response.url)
-        from urllib.parse import parse_qs, urlencode
-
-        query_dict = parse_qs(parsed_url.query)
-        query_dict['page'] = [str(next_page_num)]
-        new_query = urlencode(query_dict, doseq=True)
-
-        next_url = urlunparse(parsed_url._replace(query=new_query))
-
-        self.logger.info(f"Going to next page: {next_url}")
-        yield scrapy.Request(
-            next_url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
-            },
-            meta={
-                "playwright": True,
-                "playwright_include_page": True,
-                "playwright_page_methods": [
-                    {
-                        "method": "route",
-                        "args": ["**/*"],
-                        "kwargs": {"handler": self.block_resources}
-                    },
-                    {
-                        "method": "set_viewport_size",
-                        "args": [{"width": 1920, "height": 1080}]
-                    },
-                    {
-                        "method": "wait_for_selector",
-                        "args": ["h3.result-title"]
-                    },
-                ],
-                "page_num": next_page_num
-            },
-            callback=self.parse,
-            dont_filter=True
-        )
-
-        await page.close()
+        for request in self.listing_done(response, bool(product_links)):
+            yield request
 
     async def parse_product(self, response):
-        page = response.meta["playwright_page"]
-        await stealth(page) 
-
         name = response.css("span.base::text").get(default="N/A").strip()
 
         sizes = []
@@ -192,11 +111,11 @@ class RayBiotechSpider(scrapy.Spider):
             "endotoxin_level": extract_spec("endotoxin_level"),
         }
 
-        await page.close()
-
-        yield {
-            "name": name,
-            "sizes": "/".join(sizes),
-            "prices": "/".join(prices),
+        yield ProteinOffer(
+            vendor=self.name,
+            name=name,
+            sizes="/".join(sizes),
+            prices="/".join(prices),
+            url=response.url,
             **specs
-        }
+        )
@@ -1,6 +1,18 @@
 import scrapy
 from scrapy_playwright.page import PageMethod
 
+from tutorial.extract import listing_links
+from tutorial.items import ProteinOffer
+from tutorial.templates import register_template
+
+LISTING = register_template("rnd_listing", page_methods=[
+    PageMethod("wait_for_selector", "div#search-results"),  # container
+    PageMethod("wait_for_timeout", 2000),
+])
+PRODUCT = register_template("rnd_product", page_methods=[
+    PageMethod("wait_for_selector", "a.ecommerce_link"),
+    PageMethod("wait_for_timeout", 1000),
+])
 
 class RNDSpider(scrapy.Spider):
     name = "rnd"
@@ -11,48 +23,37 @@ class RNDSpider(scrapy.Spider):
 
     custom_settings = {
         "PLAYWRIGHT_ENABLED": True,
-        "PLAYWRIGHT_ABORT_REQUEST": lambda req: "bam.nr-data.net" in req.url,
+        "RESOURCE_BLOCK_DOMAINS": ["bam.nr-data.net"],
+    }
+
+    # Product pages are server-rendered; only open a browser if these are missing
+    static_first_selectors = {
+        "parse_product": ["h1.ds_title", "span.size_price"],
     }
 
     def start_requests(self):
         for url in self.start_urls:
             yield scrapy.Request(
                 url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        PageMethod("wait_for_selector", "div#search-results"),  # container
-                        PageMethod("wait_for_timeout", 2000),
-                    ],
-                },
+                meta={"pw_template": LISTING},
                 callback=self.parse
             )
 
     def parse(self, response):
         self.logger.info(f"[PAGE LOAD] {response.url}")
 
-        product_links = response.css("a.ecommerce_link::attr(href)").getall()
+        product_links = listing_links(response.css("a.ecommerce_link"))
         self.logger.info(f"Found {len(product_links)} product links.")
 
         for link in product_links:
-            full_url = response.urljoin(link)
+            full_url = response.urljoin(link.href)
             yield scrapy.Request(
                 full_url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                    "playwright_page_methods": [
-                        PageMethod("wait_for_selector", "a.ecommerce_link"),
-                        PageMethod("wait_for_timeout", 1000),
-                    ],
-                },
+                meta={"pw_template": PRODUCT},
                 callback=self.parse_product
             )
 
     async def parse_product(self, response):
-        page = response.meta["playwright_page"]
-
         def extract_cleaned(selector):
             return response.css(selector).get(default="").strip()
 
@@ -72,15 +73,15 @@ class RNDSpider(scrapy.Spider):
         activity = extract_detail("Activity")
         source = extract_detail("Source")
 
-        await page.close()
-
-        yield {
-            "catalog_no": catalog_no,
-            "name": name,
-            "sizes_prices": "/".join(sizes_prices) if sizes_prices else "N/A",
-            "purity": purity,
-            "endotoxin_level": endotoxin,
-            "activity": activity,
-            "source": source,
-            "url": response.url
-        }
+        # Size and price share one label here; the pipeline reads both from sizes
+        yield ProteinOffer(
+            vendor=self.name,
+            catalog_no=catalog_no,
+            name=name,
+            sizes="/".join(sizes_prices) if sizes_prices else "N/A",
+            purity=purity,
+            endotoxin_level=endotoxin,
+            activity=activity,
+            source=source,
+            url=response.url
+        )
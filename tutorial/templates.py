@@ -0,0 +1,46 @@
+from scrapy_playwright.page import PageMethod
+
+# name -> RequestTemplate; spider modules register theirs at import time
+TEMPLATES = {}
+
+
+class RequestTemplate:
+    """Playwright meta shared by every request naming it in ``meta["pw_template"]``.
+
+    Requests carry only the template name, so they stay small and can be
+    pickled to the ``JOBDIR`` disk queues; ``PlaywrightTemplateMiddleware``
+    expands the name into page methods when the request is downloaded.
+    Page methods must be given by name (not as callables) for the same
+    reason.
+    """
+
+    def __init__(self, name, page_methods=(), goto_kwargs=None, include_page=True):
+        self.name = name
+        self.page_methods = tuple(page_methods)
+        self.goto_kwargs = goto_kwargs or {}
+        self.include_page = include_page
+
+    def apply(self, request):
+        request.meta["playwright"] = True
+        request.meta["playwright_include_page"] = self.include_page
+        # Fresh objects: scrapy-playwright stores each method's result on it
+        request.meta["playwright_page_methods"] = [
+            PageMethod(method.method, *method.args, **method.kwargs) for method in self.page_methods
+        ]
+        if self.goto_kwargs:
+            request.meta["playwright_page_goto_kwargs"] = dict(self.goto_kwargs)
+
+
+def register_template(name, page_methods=(), goto_kwargs=None, include_page=True):
+    """Register a template and return its name, for use in ``meta["pw_template"]``."""
+    if name in TEMPLATES:
+        raise ValueError(f"Request template {name!r} is already registered")
+    TEMPLATES[name] = RequestTemplate(name, page_methods, goto_kwargs, include_page)
+    return name
+
+
+def get_template(name):
+    try:
+        return TEMPLATES[name]
+    except KeyError:
+        raise KeyError(f"Unknown request template {name!r}; is its spider module imported?") from None
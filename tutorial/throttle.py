@@ -0,0 +1,118 @@
+import random
+import time
+
+
+class TokenBucket:
+    """Requests per second with a small burst allowance.
+
+    ``take()`` reserves a token and returns how long to wait for it, so
+    waiting requests queue up in order instead of polling.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        now = time.monotonic()
+        self.refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class DomainRateController:
+    """AIMD rate and concurrency for one domain.
+
+    Healthy responses whose server time is under ``target_latency`` add
+    ``increase`` requests/minute to the rate, and every ``window`` of them
+    allows one more concurrent request. A throttling signal divides both
+    by ``1 / backoff``.
+    """
+
+    def __init__(self, start_rate, min_rate, max_rate, max_concurrency,
+                 target_latency=5.0, increase=1.0, backoff=0.5, window=10, burst=1):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase = increase / 60
+        self.backoff = backoff
+        self.window = window
+        self.bucket = TokenBucket(start_rate, burst)
+        self.concurrency = 1
+        self.healthy_streak = 0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def set_rate(self, rate):
+        now = time.monotonic()
+        self.bucket.refill(now)
+        self.bucket.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def on_success(self, latency):
+        if latency is not None and latency > self.target_latency:
+            # Server is struggling: hold the current rate
+            self.healthy_streak = 0
+            return
+        self.set_rate(self.rate + self.increase)
+        self.healthy_streak += 1
+        if self.healthy_streak >= self.window:
+            self.healthy_streak = 0
+            self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+
+    def on_throttled(self, retry_after=None):
+        self.healthy_streak = 0
+        self.set_rate(self.rate * self.backoff)
+        self.concurrency = max(1, int(self.concurrency * self.backoff))
+        if retry_after:
+            self.bucket.pause(retry_after)
+
+
+class RateControllers:
+    """One ``DomainRateController`` per download slot, built from settings."""
+
+    def __init__(self, settings):
+        self.start_delay = settings.getfloat("ADAPTIVE_THROTTLE_START_DELAY", 5.0)
+        self.min_delay = settings.getfloat("ADAPTIVE_THROTTLE_MIN_DELAY", 1.0)
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 120.0)
+        self.max_concurrency = settings.getint(
+            "ADAPTIVE_THROTTLE_MAX_CONCURRENCY", settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 8)
+        )
+        self.target_latency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY", 5.0)
+        self.increase = settings.getfloat("ADAPTIVE_THROTTLE_INCREASE", 1.0)
+        self.backoff = settings.getfloat("ADAPTIVE_THROTTLE_BACKOFF", 0.5)
+        self.jitter = settings.getfloat("ADAPTIVE_THROTTLE_JITTER", 0.0)
+        self.controllers = {}
+
+    def get(self, key):
+        controller = self.controllers.get(key)
+        if controller is None:
+            controller = self.controllers[key] = DomainRateController(
+                start_rate=1 / self.start_delay if self.start_delay else 1 / self.min_delay,
+                min_rate=1 / self.max_delay,
+                max_rate=1 / self.min_delay,
+                max_concurrency=self.max_concurrency,
+                target_latency=self.target_latency,
+                increase=self.increase,
+                backoff=self.backoff,
+            )
+        return controller
+
+    def wait_time(self, key):
+        wait = self.get(key).bucket.take()
+        if wait and self.jitter:
+            wait *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return wait
@@ -0,0 +1,127 @@
+import json
+import math
+import time
+from urllib.parse import urlparse
+
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+def now():
+    return time.monotonic()
+
+
+def request_times(request):
+    """Timestamps of the current attempt of ``request``, by phase boundary."""
+    return request.meta.setdefault("phase_times", {})
+
+
+async def record_navigation(page, request):
+    """Page init callback marking when ``page.goto`` starts and when the page has loaded."""
+    times = request_times(request)
+    times["navigation_start"] = now()
+
+    def on_load(page):
+        times["navigation_end"] = now()
+
+    page.once("load", on_load)
+
+
+class Histogram:
+    """Durations in log-spaced buckets (about 9% wide), so quantiles cost
+    a fixed amount of memory however many requests are recorded."""
+
+    ratio = 2 ** (1 / 8)
+    smallest = 1e-4  # seconds; anything faster lands in the first bucket
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        seconds = max(seconds, 0.0)
+        index = max(0, math.ceil(math.log(max(seconds, self.smallest) / self.smallest, self.ratio)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.smallest * self.ratio ** index, self.max)
+        return self.max
+
+    def summary(self):
+        summary = {"count": self.count, "mean": round(self.total / self.count, 4) if self.count else 0}
+        summary.update({name: round(self.quantile(q), 4) for name, q in QUANTILES.items()})
+        summary["max"] = round(self.max, 4)
+        return summary
+
+
+class PhaseTimings:
+    """Per-domain histograms of where a crawl's time goes.
+
+    Phases of a request: ``queue`` (scheduled until the engine takes it),
+    ``middlewares`` (the downloader middlewares' ``process_request``), then
+    either ``slot_and_download`` or, for Playwright, ``slot_and_browser``
+    (context and page), ``navigation`` (``page.goto`` until load) and
+    ``page_methods`` (page methods, ``slow_mo`` and reading the content).
+    After that ``callback`` and, per item, ``pipeline``.
+
+    The download slot's delay and concurrency wait has no signal of its
+    own: ``request_reached_downloader`` fires when the request joins the
+    slot's queue, so that wait is part of the first downloader phase.
+    """
+
+    def __init__(self):
+        self.histograms = {}  # (domain, phase) -> Histogram
+        self.items = {}  # id(item) -> (item, url, time it left the callback)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # Shared by PhaseTimingExtension and the two timing middlewares
+        timings = getattr(crawler, "phase_timings", None)
+        if timings is None:
+            timings = crawler.phase_timings = cls()
+        return timings
+
+    def add(self, url, phase, seconds):
+        for domain in (urlparse(url).netloc, "all"):
+            histogram = self.histograms.get((domain, phase))
+            if histogram is None:
+                histogram = self.histograms[(domain, phase)] = Histogram()
+            histogram.add(seconds)
+
+    def add_span(self, url, phase, times, start, end):
+        if start in times and end in times:
+            self.add(url, phase, times[end] - times[start])
+
+    def item_started(self, item, url):
+        self.items[id(item)] = (item, url, now())
+
+    def item_done(self, item):
+        entry = self.items.pop(id(item), None)
+        if entry is not None and entry[0] is item:
+            self.add(entry[1], "pipeline", now() - entry[2])
+
+    def report(self):
+        report = {}
+        for (domain, phase), histogram in sorted(self.histograms.items()):
+            report.setdefault(domain, {})[phase] = histogram.summary()
+        return report
+
+    def to_stats(self, stats):
+        for domain, phases in self.report().items():
+            for phase, summary in phases.items():
+                for name, value in summary.items():
+                    stats.set_value(f"timing/{domain}/{phase}/{name}", value)
+
+    def dump(self, path, spider_name):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"spider": spider_name, "phases": self.report()}, f, indent=2)